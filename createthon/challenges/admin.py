@@ -1,7 +1,9 @@
 from django.contrib import admin
-from challenges.models import Category,Challenge,ChallengeTag,Comment
+from challenges.models import Category,Challenge,ChallengeTag,Comment,IdempotencyKey,Counter
 
 admin.site.register(Challenge)
 admin.site.register(Category)
 admin.site.register(Comment)
 admin.site.register(ChallengeTag)
+admin.site.register(IdempotencyKey)
+admin.site.register(Counter)
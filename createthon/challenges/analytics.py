@@ -0,0 +1,97 @@
+import numpy as np
+
+STATUSES = ['started', 'submitted', 'completed', 'failed']
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Attempt counts are reported in these buckets: label -> [low, high)
+ATTEMPT_BUCKETS = [('0', 0, 1), ('1', 1, 2), ('2', 2, 3), ('3', 3, 4), ('4-5', 4, 6), ('6-10', 6, 11), ('11+', 11, None)]
+
+PROGRESS_DTYPE = np.dtype([
+    ('challenge_id', np.int64),
+    ('status', np.int8),
+    ('attempts', np.int32),
+    ('time_spent', np.int64)
+])
+
+
+def progress_columns(rows):
+    """
+    Stream (challenge_id, status, attempts, time_spent) rows into one
+    structured array without building intermediate Python lists.
+    """
+    return np.fromiter(
+        (
+            (challenge_id, STATUS_CODES.get(status, 0), attempts, time_spent)
+            for challenge_id, status, attempts, time_spent in rows
+        ),
+        dtype=PROGRESS_DTYPE
+    )
+
+
+def _grouped_quantile(groups, values, n_groups, q):
+    """q-quantile (linear interpolation) of values within each group; NaN for empty groups"""
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order].astype(float)
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = np.full(n_groups, np.nan)
+    present = counts > 0
+    position = starts[present] + (counts[present] - 1) * q
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    result[present] = values[low] + (values[high] - values[low]) * (position - low)
+    return result
+
+
+def compute(columns):
+    """
+    Every per-challenge statistic in one vectorized pass over the progress
+    columns. Returns {challenge_id: {field: value}} using ChallengeAnalytics
+    field names.
+    """
+    if not len(columns):
+        return {}
+
+    challenge_ids, groups = np.unique(columns['challenge_id'], return_inverse=True)
+    groups = groups.reshape(-1)
+    n_groups = len(challenge_ids)
+    status = columns['status'].astype(np.int64)
+    attempts = columns['attempts']
+
+    started = np.bincount(groups, minlength=n_groups)
+    by_status = np.bincount(
+        groups * len(STATUSES) + status, minlength=n_groups * len(STATUSES)
+    ).reshape(n_groups, len(STATUSES))
+    completed = by_status[:, STATUS_CODES['completed']]
+    attempts_mean = np.bincount(groups, weights=attempts, minlength=n_groups) / started
+
+    edges = [low for _, low, _ in ATTEMPT_BUCKETS[1:]]
+    attempt_bucket = np.digitize(attempts, edges)
+    attempt_counts = np.bincount(
+        groups * len(ATTEMPT_BUCKETS) + attempt_bucket, minlength=n_groups * len(ATTEMPT_BUCKETS)
+    ).reshape(n_groups, len(ATTEMPT_BUCKETS))
+
+    is_completed = status == STATUS_CODES['completed']
+    completed_groups = groups[is_completed]
+    completed_time = columns['time_spent'][is_completed]
+    median = _grouped_quantile(completed_groups, completed_time, n_groups, 0.5)
+    p90 = _grouped_quantile(completed_groups, completed_time, n_groups, 0.9)
+
+    solve_rate = completed / started
+    labels = [label for label, _, _ in ATTEMPT_BUCKETS]
+    return {
+        int(challenge_ids[i]): {
+            'users_started': int(started[i]),
+            'users_submitted': int(by_status[i, STATUS_CODES['submitted']]),
+            'users_completed': int(completed[i]),
+            'users_failed': int(by_status[i, STATUS_CODES['failed']]),
+            'solve_rate': float(solve_rate[i]),
+            'drop_off_rate': float(1 - solve_rate[i]),
+            'attempts_mean': float(attempts_mean[i]),
+            'attempts_distribution': dict(zip(labels, attempt_counts[i].tolist())),
+            'time_spent_median': None if np.isnan(median[i]) else float(median[i]),
+            'time_spent_p90': None if np.isnan(p90[i]) else float(p90[i])
+        }
+        for i in range(n_groups)
+    }
@@ -0,0 +1,103 @@
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from challenges.models import IdempotencyKey
+
+
+def _request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(request, key, request_hash):
+    """
+    Insert the placeholder row for (user, key) in its own transaction; the
+    unique constraint makes exactly one concurrent duplicate, on any worker,
+    the owner. Returns None for the owner, else the existing row.
+    """
+    now = timezone.now()
+    expired = Q(created_at__lt=now - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400)))
+    # A placeholder whose request died without finishing is taken over
+    abandoned = Q(status_code__isnull=True,
+                  created_at__lt=now - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)))
+    IdempotencyKey.objects.filter(expired | abandoned, user=request.user, key=key).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(user=request.user, key=key, request_hash=request_hash, created_at=now)
+        return None
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=request.user, key=key).first()
+
+
+def _replay(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {'error': 'Idempotency-Key was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make a POST action safe to retry with an Idempotency-Key header.
+
+    The first request with a key runs normally and its response is stored; a
+    repeat within IDEMPOTENCY_KEY_TTL gets the stored response back without
+    running the action again. Concurrent duplicates are serialized on a
+    placeholder row inserted before the action runs, so only one of them does
+    the work even when they reach different processes.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key is too long'}, status=status.HTTP_400_BAD_REQUEST)
+
+        request_hash = _request_hash(request)
+        deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_LOCK_WAIT', 10)
+        while True:
+            record = _claim(request, key, request_hash)
+            if record is None:
+                break
+            if record.status_code is not None or record.request_hash != request_hash:
+                return _replay(record, request_hash)
+            # Another request with this key is still running; wait for its response
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(0.05)
+
+        stored = False
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            # Server errors are not stored so the client can retry them
+            if response.status_code < 500:
+                IdempotencyKey.objects.filter(user=request.user, key=key).update(
+                    status_code=response.status_code,
+                    response_body=response.data,
+                    created_at=timezone.now()
+                )
+                stored = True
+            return response
+        finally:
+            if not stored:
+                IdempotencyKey.objects.filter(user=request.user, key=key, status_code__isnull=True).delete()
+
+    return wrapper
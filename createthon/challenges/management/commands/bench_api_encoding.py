@@ -0,0 +1,65 @@
+import gzip
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from challenges.views import ChallengeViewSet
+from createthon.middleware import brotli
+from createthon.renderers import FastJSONRenderer, orjson
+from progress.views import UserProgressViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares JSON encode time and compressed size of the challenge list and "
+        "user-progress payloads between the stock and fast renderers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username whose progress is encoded (defaults to the most active user)")
+        parser.add_argument('--repeat', type=int, default=50, help="Encodes timed per renderer")
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['user'])
+        factory = APIRequestFactory()
+        payloads = {
+            'challenges list': self._payload(factory, user, ChallengeViewSet, '/challenges/challenges/?html=true'),
+            'user-progress list': self._payload(factory, user, UserProgressViewSet, '/progress/user-progress/'),
+        }
+        renderers = {'stdlib': JSONRenderer(), 'orjson' if orjson else 'fast (no orjson)': FastJSONRenderer()}
+
+        for name, data in payloads.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({len(data)} items)"))
+            for label, renderer in renderers.items():
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    body = renderer.render(data)
+                elapsed = (time.perf_counter() - start) / options['repeat'] * 1000
+                self.stdout.write(f"  {label:<18} {elapsed:8.3f} ms/encode")
+
+            sizes = [f"raw {len(body)} B", f"gzip {len(gzip.compress(body, 6))} B"]
+            if brotli is not None:
+                sizes.append(f"br {len(brotli.compress(body, quality=5))} B")
+            self.stdout.write(f"  on the wire: {', '.join(sizes)}")
+
+    def _get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username}")
+        user = User.objects.annotate(n=Count('userprogress')).order_by('-n').first()
+        if user is None:
+            raise CommandError("No users to benchmark with")
+        return user
+
+    def _payload(self, factory, user, viewset, path):
+        """Serialized list data from the real view, before rendering"""
+        request = factory.get(path)
+        force_authenticate(request, user=user)
+        response = viewset.as_view({'get': 'list'})(request)
+        return response.data
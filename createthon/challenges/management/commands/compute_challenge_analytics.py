@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from challenges.analytics import compute, progress_columns
+from challenges.models import ChallengeAnalytics
+from progress.models import UserProgress
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes per-challenge analytics (solve rate, attempts, time spent, drop-off) "
+        "from UserProgress in one vectorized pass; meant to run periodically"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help="Progress rows fetched from the database per round trip")
+
+    def handle(self, *args, **options):
+        rows = UserProgress.objects.order_by().values_list(
+            'challenge_id', 'status', 'attempts', 'time_spent'
+        ).iterator(chunk_size=options['chunk_size'])
+        columns = progress_columns(rows)
+        stats = compute(columns)
+
+        now = timezone.now()
+        with transaction.atomic():
+            ChallengeAnalytics.objects.all().delete()
+            ChallengeAnalytics.objects.bulk_create(
+                [
+                    ChallengeAnalytics(challenge_id=challenge_id, computed_at=now, **fields)
+                    for challenge_id, fields in stats.items()
+                ],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed analytics for {len(stats)} challenges from {len(columns)} progress rows"
+        ))
@@ -0,0 +1,81 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from challenges.models import ChallengeSimilarity
+from challenges.recommendations import invalidate_recommendations
+from progress.models import UserProgress
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the user-by-challenge completion matrix and stores each challenge's "
+        "most similar challenges (cosine over co-completions) for recommendations"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbours', type=int,
+                            default=getattr(settings, 'RECOMMENDATION_NEIGHBOURS', 20),
+                            help="Similar challenges kept per challenge")
+        parser.add_argument('--min-co-completions', type=int, default=2,
+                            help="Users who must have completed both challenges for a pair to count")
+        parser.add_argument('--batch-size', type=int, default=256,
+                            help="Challenges whose similarity columns are computed per batch")
+
+    def handle(self, *args, **options):
+        pairs = np.array(
+            list(UserProgress.objects.filter(status='completed').values_list('user_id', 'challenge_id')),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        if not len(pairs):
+            self.stdout.write("No completions yet; nothing to compute")
+            return
+
+        _, user_codes = np.unique(pairs[:, 0], return_inverse=True)
+        challenge_ids, challenge_codes = np.unique(pairs[:, 1], return_inverse=True)
+        n_users, n_challenges = user_codes.max() + 1, len(challenge_ids)
+
+        # users x challenges, 1 where the user completed the challenge
+        completions = sparse.csr_matrix(
+            (np.ones(len(pairs)), (user_codes, challenge_codes)),
+            shape=(n_users, n_challenges)
+        )
+        completions.data[:] = 1
+        by_challenge = completions.T.tocsr()
+        by_column = completions.tocsc()
+        norms = np.sqrt(np.asarray(completions.sum(axis=0)).ravel())
+
+        k = options['neighbours']
+        now = timezone.now()
+        rows = []
+        for start in range(0, n_challenges, options['batch_size']):
+            end = min(start + options['batch_size'], n_challenges)
+            # challenges x batch co-completion counts, then cosine similarity
+            co = (by_challenge @ by_column[:, start:end]).toarray()
+            similarity = co / np.outer(norms, norms[start:end])
+            similarity[co < options['min_co_completions']] = 0
+            similarity[np.arange(start, end), np.arange(end - start)] = 0
+
+            for column in range(end - start):
+                scores = similarity[:, column]
+                top = np.argpartition(-scores, min(k, n_challenges) - 1)[:k]
+                for i in top[scores[top] > 0]:
+                    rows.append(ChallengeSimilarity(
+                        challenge_id=int(challenge_ids[start + column]),
+                        similar_id=int(challenge_ids[i]),
+                        score=float(scores[i]),
+                        co_completions=int(co[i, column]),
+                        computed_at=now
+                    ))
+
+        with transaction.atomic():
+            ChallengeSimilarity.objects.all().delete()
+            ChallengeSimilarity.objects.bulk_create(rows, batch_size=1000)
+            invalidate_recommendations()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(rows)} similarities for {n_challenges} challenges from {n_users} users"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from challenges.models import Category
+from createthon.images import build_variants, variants_are_current
+from progress.models import Achievement
+
+TARGETS = [
+    (Category, 'icon', 'icon_variants'),
+    (Achievement, 'badge_icon', 'badge_variants'),
+]
+
+
+class Command(BaseCommand):
+    help = "Generates resized PNG/WebP variants for category icons and achievement badges"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Rebuild variants even when they look current")
+
+    def handle(self, *args, **options):
+        for model, image_field, variants_field in TARGETS:
+            built = failed = 0
+            # Rows whose image was cleared must not keep its variants
+            cleared = model.objects.filter(
+                Q(**{image_field: ''}) | Q(**{f'{image_field}__isnull': True})
+            ).exclude(**{variants_field: {}}).update(**{variants_field: {}})
+            for instance in model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True}):
+                field_file = getattr(instance, image_field)
+                if not options['force'] and variants_are_current(field_file, getattr(instance, variants_field)):
+                    continue
+                try:
+                    variants = build_variants(field_file)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {instance.pk}: {e}")
+                    continue
+                model.objects.filter(pk=instance.pk).update(**{variants_field: variants})
+                built += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"{model.__name__}: built {built}, failed {failed}, cleared {cleared}"
+            ))
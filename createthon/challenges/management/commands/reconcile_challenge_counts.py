@@ -0,0 +1,30 @@
+from django.db.models import Count, Q
+from django.core.management.base import BaseCommand
+
+from challenges.models import Category, Challenge, Counter
+from challenges.signals import PUBLISHED_CHALLENGES
+
+
+class Command(BaseCommand):
+    help = "Recomputes the cached challenge counts on categories and the published challenge total"
+
+    def handle(self, *args, **options):
+        fixed = 0
+        categories = Category.objects.annotate(
+            actual_total=Count('challenge'),
+            actual_published=Count('challenge', filter=Q(challenge__status='published'))
+        )
+        for category in categories:
+            if (category.challenge_count, category.published_challenge_count) != (category.actual_total, category.actual_published):
+                Category.objects.filter(pk=category.pk).update(
+                    challenge_count=category.actual_total,
+                    published_challenge_count=category.actual_published
+                )
+                fixed += 1
+
+        published = Challenge.objects.filter(status='published').count()
+        Counter.objects.update_or_create(name=PUBLISHED_CHALLENGES, defaults={'value': published})
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Corrected {fixed} categories, {published} published challenges"
+        ))
@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from challenges.models import Challenge
+from challenges.rendering import content_hash, render_markdown
+
+
+class Command(BaseCommand):
+    help = "Re-renders stale challenge markdown to HTML in parallel (e.g. after a renderer upgrade)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Rendering processes (defaults to the CPU count)")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Challenges rendered and written per batch")
+        parser.add_argument('--force', action='store_true',
+                            help="Re-render every challenge, not just stale ones")
+
+    def handle(self, *args, **options):
+        rows = Challenge.objects.order_by('id').values_list('id', 'markdown_content', 'markdown_hash')
+        stale = [
+            (challenge_id, text, content_hash(text))
+            for challenge_id, text, stored_hash in rows.iterator()
+            if options['force'] or content_hash(text) != stored_hash
+        ]
+
+        batch_size = options['batch_size']
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            for i in range(0, len(stale), batch_size):
+                batch = stale[i:i + batch_size]
+                rendered = pool.map(render_markdown, [text for _, text, _ in batch], chunksize=16)
+                # bulk_update skips save() and signals; only the rendered columns change
+                Challenge.objects.bulk_update(
+                    [
+                        Challenge(id=challenge_id, markdown_html=html, markdown_hash=digest)
+                        for (challenge_id, _, digest), html in zip(batch, rendered)
+                    ],
+                    ['markdown_html', 'markdown_hash']
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {len(stale)} challenges"))
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:29
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    """Seed the cached counts from the current challenges"""
+    Category = apps.get_model('challenges', 'Category')
+    Challenge = apps.get_model('challenges', 'Challenge')
+    Counter = apps.get_model('challenges', 'Counter')
+    db_alias = schema_editor.connection.alias
+
+    categories = Category.objects.using(db_alias).annotate(
+        total=Count('challenge'),
+        published=Count('challenge', filter=Q(challenge__status='published'))
+    )
+    for category in categories:
+        Category.objects.using(db_alias).filter(pk=category.pk).update(
+            challenge_count=category.total,
+            published_challenge_count=category.published
+        )
+    Counter.objects.using(db_alias).create(
+        name='published_challenges',
+        value=Challenge.objects.using(db_alias).filter(status='published').count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='challenge_count',
+            field=models.IntegerField(default=0, help_text='All challenges, kept current by signals'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_challenge_count',
+            field=models.IntegerField(default=0, help_text='Published challenges, kept current by signals'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0004_challenge_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='markdown_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='markdown_html',
+            field=models.TextField(blank=True, editable=False, help_text='Sanitized HTML rendered from markdown_content'),
+        ),
+    ]
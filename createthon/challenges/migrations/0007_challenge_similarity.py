@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text="Cosine similarity of the two challenges' completion vectors")),
+                ('co_completions', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='challenges.challenge')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='challenges.challenge')),
+            ],
+            options={
+                'ordering': ['challenge', '-score'],
+                'unique_together': {('challenge', 'similar')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0007_challenge_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users_started', models.IntegerField(default=0, help_text='Users with any progress on the challenge')),
+                ('users_submitted', models.IntegerField(default=0)),
+                ('users_completed', models.IntegerField(default=0)),
+                ('users_failed', models.IntegerField(default=0)),
+                ('solve_rate', models.FloatField(default=0, help_text='Share of users who started and went on to complete')),
+                ('drop_off_rate', models.FloatField(default=0, help_text='Share of users who started but never completed')),
+                ('attempts_mean', models.FloatField(default=0)),
+                ('attempts_distribution', models.JSONField(blank=True, default=dict)),
+                ('time_spent_median', models.FloatField(blank=True, help_text='Seconds, over completed users', null=True)),
+                ('time_spent_p90', models.FloatField(blank=True, help_text='Seconds, over completed users', null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('challenge', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='challenges.challenge')),
+            ],
+        ),
+    ]
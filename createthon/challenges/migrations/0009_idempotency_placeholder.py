@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0008_challenge_analytics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='status_code',
+            field=models.IntegerField(blank=True, help_text='Empty while the first request is running', null=True),
+        ),
+    ]
@@ -1,15 +1,41 @@
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from challenges.rendering import cached_render, content_hash
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     icon = models.ImageField(upload_to='uploads/category_icons/', null=True, blank=True)
+    icon_variants = models.JSONField(default=dict, blank=True, editable=False)
+    challenge_count = models.IntegerField(default=0, help_text="All challenges, kept current by signals")
+    published_challenge_count = models.IntegerField(default=0, help_text="Published challenges, kept current by signals")
 
     def __str__(self):
         return self.name
 
+class Counter(models.Model):
+    """Named site-wide counter, updated atomically"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def get_value(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def add(cls, name, delta):
+        if not cls.objects.filter(name=name).update(value=models.F('value') + delta):
+            counter, created = cls.objects.get_or_create(name=name, defaults={'value': delta})
+            if not created:
+                cls.objects.filter(name=name).update(value=models.F('value') + delta)
+
 class Challenge(models.Model):
     DIFFICULTY_CHOICES = [
         ('beginner', 'Beginner'),
@@ -30,6 +56,8 @@ class Challenge(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     markdown_content = models.TextField(blank=True)
+    markdown_html = models.TextField(blank=True, editable=False, help_text="Sanitized HTML rendered from markdown_content")
+    markdown_hash = models.CharField(max_length=64, blank=True, editable=False)
     code_template = models.TextField(blank=True, help_text="Starter code for the challenge")
     solution = models.TextField(blank=True, help_text="Solution code for validation")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='published')
@@ -38,6 +66,38 @@ class Challenge(models.Model):
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if self.refresh_markdown_html():
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'markdown_html', 'markdown_hash'}
+        super().save(*args, **kwargs)
+
+    def refresh_markdown_html(self):
+        """Re-render the stored HTML if the markdown or renderer changed; returns True if it did"""
+        digest = content_hash(self.markdown_content)
+        if digest == self.markdown_hash:
+            return False
+        self.markdown_html = cached_render(self.markdown_content, digest)
+        self.markdown_hash = digest
+        return True
+
+    @property
+    def rendered_markdown(self):
+        """Stored HTML, or a cached render when the stored copy is stale"""
+        digest = content_hash(self.markdown_content)
+        if digest == self.markdown_hash:
+            return self.markdown_html
+        return cached_render(self.markdown_content, digest)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the counters were last told about this row (see challenges/signals.py)
+        if 'category_id' in field_names and 'status' in field_names:
+            instance._counted_as = (instance.category_id, instance.status == 'published')
+        return instance
     
     def validate_submission(self, submission_code):
         # For basic implementation, just check if submission matches solution
@@ -61,3 +121,59 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.challenge.title}"
+
+class IdempotencyKey(models.Model):
+    """Stored response for a POST sent with an Idempotency-Key header"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.IntegerField(null=True, blank=True, help_text="Empty while the first request is running")
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for {self.user.username}"
+
+class ChallengeSimilarity(models.Model):
+    """
+    Item-to-item similarity from co-completions, written in batches by the
+    compute_challenge_similarity command. Only each challenge's top
+    neighbours are kept.
+    """
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='similarities')
+    similar = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="Cosine similarity of the two challenges' completion vectors")
+    co_completions = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('challenge', 'similar')
+        ordering = ['challenge', '-score']
+
+    def __str__(self):
+        return f"{self.challenge.title} ~ {self.similar.title} ({self.score:.2f})"
+
+
+class ChallengeAnalytics(models.Model):
+    """
+    Per-challenge progress statistics, recomputed in one pass over UserProgress
+    by the compute_challenge_analytics command
+    """
+    challenge = models.OneToOneField(Challenge, on_delete=models.CASCADE, related_name='analytics')
+    users_started = models.IntegerField(default=0, help_text="Users with any progress on the challenge")
+    users_submitted = models.IntegerField(default=0)
+    users_completed = models.IntegerField(default=0)
+    users_failed = models.IntegerField(default=0)
+    solve_rate = models.FloatField(default=0, help_text="Share of users who started and went on to complete")
+    drop_off_rate = models.FloatField(default=0, help_text="Share of users who started but never completed")
+    attempts_mean = models.FloatField(default=0)
+    attempts_distribution = models.JSONField(default=dict, blank=True)
+    time_spent_median = models.FloatField(null=True, blank=True, help_text="Seconds, over completed users")
+    time_spent_p90 = models.FloatField(null=True, blank=True, help_text="Seconds, over completed users")
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Analytics for {self.challenge.title}"
@@ -0,0 +1,163 @@
+import threading
+
+import numpy as np
+from django.db.models import Count
+from scipy import sparse
+
+from challenges.models import Challenge, ChallengeSimilarity
+from challenges.tag_index import challenge_index
+from createthon.versioning import VersionStamp
+
+version_stamp = VersionStamp('challenge-similarity-version')
+
+DIFFICULTY_LEVELS = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+# Weight by how far a challenge's difficulty is from the user's usual level,
+# indexed by (challenge level - user level) + 2: easier challenges fade out and
+# the next level up is favoured
+DIFFICULTY_WEIGHTS = np.array([0.3, 0.6, 1.0, 1.25, 0.5])
+
+# Popularity only breaks ties between challenges the similarities rank equally
+POPULARITY_WEIGHT = 0.01
+
+
+class RecommendationSnapshot:
+    """
+    One consistent load of the similarity matrix and the per-challenge weights,
+    all aligned with the same challenge index build. Never modified after it
+    is built, so a request scoring against one cannot see arrays from two loads.
+    """
+
+    def __init__(self, ids=(), similarity=None, levels=None, category_codes=None, popularity=None,
+                 version=None):
+        n = len(ids)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.position = {int(challenge_id): i for i, challenge_id in enumerate(self.ids)}
+        self.similarity = similarity if similarity is not None else sparse.csr_matrix((n, n))
+        self.levels = levels if levels is not None else np.zeros(n, dtype=np.int8)
+        self.category_codes = category_codes if category_codes is not None else np.zeros(n, dtype=np.int64)
+        self.popularity = popularity if popularity is not None else np.zeros(n)
+        self.version = version
+        for array in (self.ids, self.levels, self.category_codes, self.popularity):
+            array.setflags(write=False)
+
+    def recommend(self, completed_ids, limit=10):
+        """
+        Unsolved published challenges for a user who completed the given
+        challenges, best first. Returns the basis ('similar_completions', or
+        'popular' when the user's history gives no signal) and a list of
+        (challenge id, score) pairs.
+        """
+        n = len(self.ids)
+        solved = np.array([self.position[i] for i in completed_ids if i in self.position], dtype=np.int64)
+        if n == 0 or len(solved) == n:
+            return 'popular', []
+
+        solved_vector = np.zeros(n)
+        solved_vector[solved] = 1
+        scores = self.similarity @ solved_vector
+        basis = 'similar_completions' if scores.any() else 'popular'
+
+        if len(solved):
+            level = int(round(self.levels[solved].mean()))
+            category_share = np.bincount(
+                self.category_codes[solved], minlength=self.category_codes.max() + 1
+            ) / len(solved)
+        else:
+            # No history yet: treat beginner challenges as the next level up
+            level = -1
+            category_share = np.zeros(self.category_codes.max() + 1)
+        weights = (
+            DIFFICULTY_WEIGHTS[np.clip(self.levels - level, -2, 2) + 2]
+            * (1 + category_share[self.category_codes])
+        )
+
+        scores = (scores + POPULARITY_WEIGHT * self.popularity) * weights
+        scores[solved] = -np.inf
+        limit = min(limit, n - len(solved))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return basis, [(int(self.ids[i]), float(scores[i])) for i in top]
+
+
+class ChallengeRecommender:
+    """
+    In-process similarity matrix over published challenges.
+
+    Precomputed item similarities are loaded into a sparse matrix aligned with
+    the challenge index, so scoring every unsolved challenge for a user is one
+    sparse matrix-vector product plus elementwise difficulty and category
+    weights. Each process reloads the matrix after the similarity command or
+    a catalog change bumps a version stamp in the cache. Each load is a new
+    RecommendationSnapshot swapped in with one assignment.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = RecommendationSnapshot()
+
+    def _build(self, version, index):
+        position = index.position
+        n = len(index.ids)
+
+        pairs = ChallengeSimilarity.objects.filter(
+            challenge__status='published',
+            similar__status='published'
+        ).values_list('challenge_id', 'similar_id', 'score')
+        rows, cols, scores = [], [], []
+        for challenge_id, similar_id, score in pairs.iterator(chunk_size=5000):
+            if challenge_id in position and similar_id in position:
+                rows.append(position[challenge_id])
+                cols.append(position[similar_id])
+                scores.append(score)
+        # Stored as (similar, challenge) so a product with a user's solved vector
+        # sums the similarity of every candidate to everything they solved
+        similarity = sparse.csr_matrix((scores, (cols, rows)), shape=(n, n))
+
+        levels = np.zeros(n, dtype=np.int8)
+        categories = np.zeros(n, dtype=np.int64)
+        for challenge_id, difficulty, category_id in Challenge.objects.filter(
+            status='published'
+        ).values_list('id', 'difficulty', 'category_id'):
+            if challenge_id in position:
+                levels[position[challenge_id]] = DIFFICULTY_LEVELS.get(difficulty, 0)
+                categories[position[challenge_id]] = category_id
+        _, category_codes = np.unique(categories, return_inverse=True)
+
+        popularity = np.zeros(n)
+        for challenge_id, completions in Challenge.objects.filter(
+            status='published',
+            userprogress__status='completed'
+        ).annotate(completions=Count('userprogress')).values_list('id', 'completions'):
+            # Published after the index was built; it joins on the next rebuild
+            if challenge_id in position:
+                popularity[position[challenge_id]] = completions
+        if popularity.any():
+            popularity /= popularity.max()
+
+        return RecommendationSnapshot(
+            index.ids, similarity, levels, category_codes.reshape(-1), popularity, version
+        )
+
+    def refresh(self):
+        """The current snapshot, reloaded first if the similarities or the published catalog changed"""
+        index = challenge_index.refresh()
+        version = (version_stamp.current(), index.version)
+        snapshot = self._snapshot
+        if version != snapshot.version:
+            with self._lock:
+                snapshot = self._snapshot
+                if version != snapshot.version:
+                    snapshot = self._snapshot = self._build(version, index)
+        return snapshot
+
+    def invalidate(self):
+        version_stamp.bump()
+
+
+challenge_recommender = ChallengeRecommender()
+
+
+def invalidate_recommendations():
+    """Mark every process's similarity matrix stale once the current transaction commits"""
+    version_stamp.bump_on_commit()
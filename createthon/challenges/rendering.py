@@ -0,0 +1,111 @@
+import hashlib
+from html import escape
+from html.parser import HTMLParser
+
+import markdown
+from django.core.cache import cache
+
+# Part of every content hash, so bumping it (or upgrading Markdown) marks all stored HTML stale
+RENDERER_VERSION = f"markdown-{markdown.__version__}/1"
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul'
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'code': {'class'},
+    'img': {'src', 'alt', 'title'},
+    'td': {'align'},
+    'th': {'align'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_URL_PREFIXES = ('http://', 'https://', 'mailto:', '/', '#')
+VOID_TAGS = {'br', 'hr', 'img'}
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+
+
+class _Sanitizer(HTMLParser):
+    """Re-emits HTML keeping only allowlisted tags and attributes"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRIBUTES.get(tag, ()) or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not value.strip().lower().startswith(SAFE_URL_PREFIXES):
+                continue
+            kept.append(f' {name}="{escape(value, quote=True)}"')
+        self.output.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open_tags:
+            return
+        # Close anything left open inside this tag so the output stays well-formed
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.output.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.output.append(f"</{self.open_tags.pop()}>")
+        return ''.join(self.output)
+
+
+def sanitize_html(html):
+    parser = _Sanitizer()
+    parser.feed(html)
+    return parser.close()
+
+
+def content_hash(text):
+    """Hash of the markdown source together with the renderer version"""
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{text}".encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    """Render markdown to sanitized HTML"""
+    return sanitize_html(markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS))
+
+
+def cached_render(text, digest=None):
+    """Render through the shared cache, keyed by content hash"""
+    digest = digest or content_hash(text)
+    key = f"markdown-html:{digest}"
+    html = cache.get(key)
+    if html is None:
+        html = render_markdown(text)
+        cache.set(key, html, None)
+    return html
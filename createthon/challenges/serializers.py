@@ -1,12 +1,18 @@
 from rest_framework import serializers
-from challenges.models import Challenge, Category, Comment, ChallengeTag
+from challenges.models import Challenge, Category, Comment, ChallengeTag, ChallengeAnalytics
 from progress.models import UserProgress
 from django.contrib.auth.models import User
+from createthon.images import variant_urls
 
 class CategorySerializer(serializers.ModelSerializer):
+    icon_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'icon']
+        fields = ['id', 'name', 'description', 'icon', 'icon_variants']
+
+    def get_icon_variants(self, obj):
+        return variant_urls(obj.icon_variants)
 
 class ChallengeTagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,6 +45,7 @@ class ChallengeSerializer(serializers.ModelSerializer):
         write_only=True
     )
     tags = ChallengeTagSerializer(many=True, read_only=True)
+    markdown_html = serializers.CharField(source='rendered_markdown', read_only=True)
     
     class Meta:
         model = Challenge
@@ -46,8 +53,15 @@ class ChallengeSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'difficulty', 
             'points', 'category', 'category_id', 'created_at', 
             'markdown_content', 'code_template', 'status',
-            'time_limit', 'tags'
+            'time_limit', 'tags', 'markdown_html'
         ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rendered HTML is opt-in with ?html=true
+        request = self.context.get('request')
+        if not (request and request.query_params.get('html', '').lower() in ('1', 'true', 'yes')):
+            self.fields.pop('markdown_html')
         
 class ChallengeDetailSerializer(ChallengeSerializer):
     comments = serializers.SerializerMethodField()
@@ -58,4 +72,16 @@ class ChallengeDetailSerializer(ChallengeSerializer):
     def get_comments(self, obj):
         # Get only top-level comments (no parent)
         comments = obj.comments.filter(parent=None)
-        return CommentSerializer(comments, many=True).data
\ No newline at end of file
+        return CommentSerializer(comments, many=True).data
+
+class ChallengeAnalyticsSerializer(serializers.ModelSerializer):
+    title = serializers.ReadOnlyField(source='challenge.title')
+
+    class Meta:
+        model = ChallengeAnalytics
+        fields = [
+            'challenge', 'title', 'users_started', 'users_submitted',
+            'users_completed', 'users_failed', 'solve_rate', 'drop_off_rate',
+            'attempts_mean', 'attempts_distribution', 'time_spent_median',
+            'time_spent_p90', 'computed_at'
+        ]
@@ -0,0 +1,68 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from challenges.models import Category, Challenge, ChallengeTag, Counter
+from challenges.tag_index import invalidate_challenge_index
+from createthon.images import enqueue_variants
+
+PUBLISHED_CHALLENGES = 'published_challenges'
+
+
+def _adjust(category_id, published, delta):
+    """Apply a +1/-1 change to the counters for one (category, published) state"""
+    changes = {'challenge_count': F('challenge_count') + delta}
+    if published:
+        changes['published_challenge_count'] = F('published_challenge_count') + delta
+        Counter.add(PUBLISHED_CHALLENGES, delta)
+    Category.objects.filter(pk=category_id).update(**changes)
+
+
+@receiver(pre_save, sender=Challenge)
+def remember_counted_state(sender, instance, raw, **kwargs):
+    """Look up the stored state for instances that were not loaded from the database"""
+    if raw or instance.pk is None or hasattr(instance, '_counted_as'):
+        return
+    stored = Challenge.objects.filter(pk=instance.pk).values_list('category_id', 'status').first()
+    if stored:
+        instance._counted_as = (stored[0], stored[1] == 'published')
+
+
+@receiver(post_save, sender=Challenge)
+def update_counts_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_counted_as', None)
+    new = (instance.category_id, instance.status == 'published')
+    if old != new:
+        if old is not None:
+            _adjust(*old, -1)
+        _adjust(*new, 1)
+    instance._counted_as = new
+
+
+@receiver(post_delete, sender=Challenge)
+def update_counts_on_delete(sender, instance, **kwargs):
+    counted = getattr(instance, '_counted_as', (instance.category_id, instance.status == 'published'))
+    _adjust(*counted, -1)
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+@receiver(post_save, sender=ChallengeTag)
+@receiver(post_delete, sender=ChallengeTag)
+def refresh_index_on_change(sender, **kwargs):
+    if not kwargs.get('raw'):
+        invalidate_challenge_index()
+
+
+@receiver(m2m_changed, sender=Challenge.tags.through)
+def refresh_index_on_tag_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_challenge_index()
+
+
+@receiver(post_save, sender=Category)
+def generate_icon_variants(sender, instance, raw, **kwargs):
+    if not raw:
+        enqueue_variants(instance, 'icon', 'icon_variants')
@@ -0,0 +1,117 @@
+import threading
+
+from challenges.models import Challenge
+from createthon.versioning import VersionStamp
+
+version_stamp = VersionStamp('challenge-index-version')
+
+
+class IndexSnapshot:
+    """
+    One consistent build of the challenge index. Never modified after it is
+    built, so a reader holding one sees positions and bitmaps from the same
+    build however often the index is rebuilt meanwhile.
+    """
+
+    def __init__(self, ids=(), by_tag=None, by_difficulty=None, by_category=None, version=None):
+        self.ids = list(ids)
+        self.position = {challenge_id: i for i, challenge_id in enumerate(self.ids)}
+        self.all = (1 << len(self.ids)) - 1
+        self.by_tag = by_tag or {}
+        self.by_difficulty = by_difficulty or {}
+        self.by_category = by_category or {}
+        self.version = version
+
+    def query(self, all_tags=(), any_tags=(), not_tags=(), difficulty=None, category=None):
+        """Bitmap of published challenges matching every given filter"""
+        result = self.all
+        for tag in all_tags:
+            result &= self.by_tag.get(tag, 0)
+        if any_tags:
+            matches = 0
+            for tag in any_tags:
+                matches |= self.by_tag.get(tag, 0)
+            result &= matches
+        for tag in not_tags:
+            result &= ~self.by_tag.get(tag, 0)
+        if difficulty:
+            result &= self.by_difficulty.get(difficulty, 0)
+        if category:
+            try:
+                result &= self.by_category.get(int(category), 0)
+            except (TypeError, ValueError):
+                result = 0
+        return result
+
+    def from_ids(self, ids):
+        """Bitmap for a set of challenge ids (unknown or unpublished ids are ignored)"""
+        bitmap = 0
+        for challenge_id in ids:
+            if challenge_id in self.position:
+                bitmap |= 1 << self.position[challenge_id]
+        return bitmap
+
+    def to_ids(self, bitmap):
+        """Challenge ids for the set bits of a bitmap"""
+        ids = []
+        while bitmap:
+            low_bit = bitmap & -bitmap
+            ids.append(self.ids[low_bit.bit_length() - 1])
+            bitmap ^= low_bit
+        return ids
+
+
+class ChallengeIndex:
+    """
+    In-process bitmap index over published challenges.
+
+    Challenges are numbered by position in id order and every tag, difficulty
+    and category maps to a Python int with one bit per matching challenge, so
+    AND/OR/NOT filters over any number of tags are a few integer operations.
+    Changes bump a version stamp in the cache and each process rebuilds its
+    copy on the next lookup after seeing a new stamp. Each build is a new
+    IndexSnapshot swapped in with one assignment.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = IndexSnapshot()
+
+    def _build(self, version):
+        # Challenges and their tags in one statement, so both come from the same
+        # database snapshot; a challenge without tags has one row with None
+        rows = Challenge.objects.filter(status='published').order_by('id').values_list(
+            'id', 'difficulty', 'category_id', 'tags__name'
+        )
+        ids, by_tag, by_difficulty, by_category = [], {}, {}, {}
+        for challenge_id, difficulty, category_id, tag_name in rows:
+            if not ids or ids[-1] != challenge_id:
+                ids.append(challenge_id)
+                bit = 1 << (len(ids) - 1)
+                by_difficulty[difficulty] = by_difficulty.get(difficulty, 0) | bit
+                by_category[category_id] = by_category.get(category_id, 0) | bit
+            if tag_name is not None:
+                by_tag[tag_name] = by_tag.get(tag_name, 0) | bit
+        return IndexSnapshot(ids, by_tag, by_difficulty, by_category, version)
+
+    def refresh(self):
+        """The current snapshot, rebuilt first if another process (or this one) changed the catalog"""
+        version = version_stamp.current()
+        snapshot = self._snapshot
+        if version != snapshot.version:
+            with self._lock:
+                snapshot = self._snapshot
+                if version != snapshot.version:
+                    snapshot = self._snapshot = self._build(version)
+        return snapshot
+
+    def invalidate(self):
+        version_stamp.bump()
+
+
+challenge_index = ChallengeIndex()
+
+
+def invalidate_challenge_index():
+    """Mark every process's index stale once the current transaction commits"""
+    version_stamp.bump_on_commit()
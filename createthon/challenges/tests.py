@@ -1,3 +1,301 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from challenges.models import Category, Challenge, ChallengeTag
+from challenges.recommendations import challenge_recommender
+from challenges.rendering import ALLOWED_ATTRIBUTES, ALLOWED_TAGS, SAFE_URL_PREFIXES, URL_ATTRIBUTES, render_markdown
+from challenges.tag_index import challenge_index
+from progress.models import Submission, UserProgress
+
+
+class ConcurrentProgressTests(TransactionTestCase):
+    """Parallel starts and submissions from one user must not lose counter updates"""
+    PARALLEL = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('racer', 'racer@example.com', 'x')
+        category = Category.objects.create(name='Python')
+        self.challenge = Challenge.objects.create(
+            title='Sum', description='Add numbers', difficulty='beginner', points=10,
+            category=category, status='published', solution='print(1)'
+        )
+
+    def _in_parallel(self, path, data, **headers):
+        def call(_):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                response = client.post(path, data, format='json', **headers)
+                return response.status_code, response.get('Idempotent-Replayed')
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.PARALLEL) as pool:
+            responses = list(pool.map(call, range(self.PARALLEL)))
+        return [code for code, _ in responses], [replayed for _, replayed in responses]
+
+    def test_parallel_first_starts_count_every_restart(self):
+        codes, _ = self._in_parallel(f'/challenges/challenges/{self.challenge.pk}/start_challenge/', {})
+
+        self.assertEqual(codes, [200] * self.PARALLEL)
+        progress = UserProgress.objects.get(user=self.user, challenge=self.challenge)
+        # The first start creates the row, every later one counts as a restart
+        self.assertEqual(progress.attempts, self.PARALLEL - 1)
+
+    def test_start_losing_the_insert_race_counts_as_restart(self):
+        # SQLite serializes the threads above, so replay the Postgres interleaving
+        # directly: another first start inserts the row between our update and insert
+        real_get_or_create = QuerySet.get_or_create
+
+        def racing_get_or_create(queryset, **kwargs):
+            if queryset.model is UserProgress:
+                UserProgress.objects.create(user=self.user, challenge=self.challenge, status='started')
+            return real_get_or_create(queryset, **kwargs)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.object(QuerySet, 'get_or_create', racing_get_or_create):
+            response = client.post(f'/challenges/challenges/{self.challenge.pk}/start_challenge/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserProgress.objects.get(user=self.user, challenge=self.challenge).attempts, 1)
+
+    def test_parallel_submissions_keep_every_increment(self):
+        codes, _ = self._in_parallel(
+            f'/challenges/challenges/{self.challenge.pk}/submit_challenge/',
+            {'submission_code': 'print(2)', 'time_spent': 5}
+        )
+
+        self.assertEqual(codes, [200] * self.PARALLEL)
+        progress = UserProgress.objects.get(user=self.user, challenge=self.challenge)
+        self.assertEqual(progress.attempts, self.PARALLEL)
+        self.assertEqual(progress.time_spent, 5 * self.PARALLEL)
+        self.assertEqual(Submission.objects.filter(user=self.user).count(), self.PARALLEL)
+
+    def test_parallel_duplicates_with_one_idempotency_key_run_once(self):
+        codes, replayed = self._in_parallel(
+            f'/challenges/challenges/{self.challenge.pk}/submit_challenge/',
+            {'submission_code': 'print(2)', 'time_spent': 5},
+            HTTP_IDEMPOTENCY_KEY='double-click'
+        )
+
+        self.assertEqual(codes, [200] * self.PARALLEL)
+        self.assertEqual(replayed.count('true'), self.PARALLEL - 1)
+        self.assertEqual(Submission.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(UserProgress.objects.get(user=self.user, challenge=self.challenge).attempts, 1)
+
+
+class TagFilterTests(TestCase):
+    """Bitmap AND/OR/NOT filters and facet counts agree with the catalog"""
+
+    def setUp(self):
+        cache.clear()
+        python, js = Category.objects.create(name='Python'), Category.objects.create(name='JavaScript')
+        self.categories = {'Python': python, 'JavaScript': js}
+        tags = {name: ChallengeTag.objects.create(name=name) for name in ('py', 'js', 'loops')}
+        self.challenges = {}
+        for title, difficulty, category, tag_names, status in [
+            ('A', 'beginner', python, ['py', 'loops'], 'published'),
+            ('B', 'intermediate', python, ['py'], 'published'),
+            ('C', 'advanced', js, ['js', 'loops'], 'published'),
+            ('D', 'beginner', js, [], 'published'),
+            ('E', 'beginner', python, ['py'], 'draft')
+        ]:
+            challenge = Challenge.objects.create(
+                title=title, description=f'Challenge {title}', difficulty=difficulty, points=10,
+                category=category, status=status, solution='print(1)'
+            )
+            challenge.tags.set([tags[name] for name in tag_names])
+            self.challenges[title] = challenge
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('browser', 'browser@example.com', 'x'))
+
+    def titles(self, query):
+        response = self.client.get(f'/challenges/challenges/?{query}')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return sorted(challenge['title'] for challenge in results)
+
+    def test_any_all_and_not_filters(self):
+        self.assertEqual(self.titles('tags=py&tags=js'), ['A', 'B', 'C'])
+        self.assertEqual(self.titles('tags_all=py&tags_all=loops'), ['A'])
+        self.assertEqual(self.titles('tags_not=py'), ['C', 'D'])
+        self.assertEqual(self.titles('tags_not=loops&difficulty=beginner'), ['D'])
+        self.assertEqual(self.titles(f'tags=loops&category={self.categories["JavaScript"].pk}'), ['C'])
+
+    def test_unknown_tags(self):
+        self.assertEqual(self.titles('tags_all=py&tags_all=nope'), [])
+        self.assertEqual(self.titles('tags=nope'), [])
+        self.assertEqual(self.titles('tags_not=nope'), ['A', 'B', 'C', 'D'])
+
+    def test_not_filter_after_the_catalog_shrinks(self):
+        self.assertEqual(self.titles('tags_not=py'), ['C', 'D'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.challenges['C'].status = 'draft'
+            self.challenges['C'].save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.challenges['B'].delete()
+
+        # The complement is taken against the smaller catalog, so no stale bits turn into matches
+        self.assertEqual(self.titles('tags_not=py'), ['D'])
+        self.assertEqual(self.titles('tags_not=js'), ['A', 'D'])
+        self.assertEqual(self.titles('tags=loops'), ['A'])
+
+    def test_facets_count_each_facet_without_its_own_filter(self):
+        response = self.client.get('/challenges/challenges/facets/?difficulty=beginner&tags=py')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual([challenge['title'] for challenge in response.data['results']], ['A'])
+        facets = response.data['facets']
+        self.assertEqual(facets['difficulty'], {'beginner': 1, 'intermediate': 1, 'advanced': 0})
+        self.assertEqual(facets['tags'], {'py': 1, 'js': 0, 'loops': 1})
+        self.assertEqual(
+            {category['name']: category['count'] for category in facets['category']},
+            {'Python': 1, 'JavaScript': 0}
+        )
+
+
+class RecommendationTests(TestCase):
+    """Recommendations survive catalog changes between rebuilds and cap the page size"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Python')
+        self.challenges = [
+            Challenge.objects.create(
+                title=f'R{i}', description=f'Challenge {i}', difficulty='beginner', points=10,
+                category=category, status='published', solution='print(1)'
+            )
+            for i in range(60)
+        ]
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recommended(self, query=''):
+        return self.client.get(f'/challenges/challenges/recommended/{query}')
+
+    def test_limit_is_clamped_and_must_be_a_number(self):
+        self.assertEqual(len(self.recommended('?limit=0').data['results']), 1)
+        self.assertEqual(len(self.recommended('?limit=-5').data['results']), 1)
+        self.assertEqual(len(self.recommended('?limit=500').data['results']), 50)
+        self.assertEqual(len(self.recommended().data['results']), 10)
+        for bad in ('abc', '2.5', ''):
+            self.assertEqual(self.recommended(f'?limit={bad}').status_code, 400)
+
+    def test_challenge_published_after_the_index_was_built_is_skipped(self):
+        challenge_index.refresh()
+        # Published without signals, so the index still predates it
+        late = Challenge.objects.create(
+            title='Late', description='Late', difficulty='beginner', points=10,
+            category=self.challenges[0].category, status='draft', solution='print(1)'
+        )
+        challenge_index.refresh()
+        Challenge.objects.filter(pk=late.pk).update(status='published')
+        UserProgress.objects.create(user=self.user, challenge=late, status='completed')
+        challenge_recommender.invalidate()
+
+        snapshot = challenge_recommender.refresh()
+
+        self.assertNotIn(late.pk, snapshot.position)
+        response = self.recommended()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Late', [challenge['title'] for challenge in response.data['results']])
+
+    def test_held_snapshot_is_unaffected_by_a_reload(self):
+        held = challenge_recommender.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.challenges[0].delete()
+
+        reloaded = challenge_recommender.refresh()
+
+        self.assertIsNot(reloaded, held)
+        self.assertEqual((len(held.ids), len(reloaded.ids)), (60, 59))
+        self.assertEqual(len(held.recommend([], limit=60)[1]), 60)
+
+
+class _Elements(HTMLParser):
+    """Every (tag, attributes) pair in a piece of HTML, as a browser would see them"""
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.elements = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.elements.append((tag, dict(attrs)))
+
+
+class MarkdownSanitizerTests(SimpleTestCase):
+    """Challenge markdown is rendered to HTML that cannot run script"""
+    ATTACKS = [
+        '[x](javascript:alert(1))',
+        '[x](JavaScript:alert(1))',
+        '<img src=x onerror=alert(1)>',
+        '<a href="&#106;avascript:alert(1)">x</a>',
+        '<a href="jav&#x09;ascript:alert(1)">x</a>',
+        '<a href=" JAVASCRIPT:alert(1)">x</a>',
+        '<a href="https://example.com" onclick="alert(1)">x</a>',
+        '<a href="https://example.com/&quot; onmouseover=&quot;alert(1)">x</a>',
+        '<svg><script>alert(1)</script></svg>',
+        '<svg onload=alert(1)><a href="https://example.com">y</a></svg>',
+        '<math><mi xlink:href="javascript:alert(1)">x</mi></math>',
+        '<![CDATA[<script>alert(1)</script>]]>',
+        '<!-- <script>alert(1)</script> -->',
+        '<scr<script>ipt>alert(1)</script>',
+        '<iframe src="https://example.com"></iframe>',
+        '<style>body { background: url(javascript:alert(1)) }</style>',
+        '![i](data:image/svg+xml;base64,PHN2ZyBvbmxvYWQ9YWxlcnQoMSk+)',
+        '```\n<script>alert(1)</script>\n```',
+    ]
+
+    def assertInert(self, html):
+        for tag, attrs in _Elements(html).elements:
+            self.assertIn(tag, ALLOWED_TAGS, html)
+            for name, value in attrs.items():
+                self.assertIn(name, ALLOWED_ATTRIBUTES.get(tag, ()), html)
+                if name in URL_ATTRIBUTES:
+                    self.assertTrue(value.strip().lower().startswith(SAFE_URL_PREFIXES), html)
+
+    def test_attacks_render_inert(self):
+        for attack in self.ATTACKS:
+            with self.subTest(attack=attack):
+                html = render_markdown(attack)
+                self.assertInert(html)
+                self.assertNotIn('<script', html.lower())
+                self.assertNotIn('javascript:', html.lower())
+
+    def test_dangerous_urls_are_dropped_from_links(self):
+        self.assertEqual(render_markdown('[x](javascript:alert(1))'), '<p><a>x</a></p>')
+        self.assertEqual(render_markdown('<a href="&#106;avascript:alert(1)">x</a>'), '<p><a>x</a></p>')
+        self.assertEqual(render_markdown('<img src=x onerror=alert(1)>'), '<p><img></p>')
+
+    def test_quotes_in_urls_cannot_open_new_attributes(self):
+        html = render_markdown('<a href="https://example.com/&quot; onmouseover=&quot;alert(1)">x</a>')
+        self.assertEqual(_Elements(html).elements, [
+            ('p', {}),
+            ('a', {'href': 'https://example.com/" onmouseover="alert(1)'})
+        ])
+
+    def test_code_blocks_are_escaped_text(self):
+        self.assertEqual(
+            render_markdown('```\n<script>alert(1)</script>\n```'),
+            '<pre><code>&lt;script&gt;alert(1)&lt;/script&gt;\n</code></pre>'
+        )
+
+    def test_safe_markup_is_kept(self):
+        self.assertEqual(
+            render_markdown('[docs](https://example.com "Docs") ![a](/media/a.png)'),
+            '<p><a href="https://example.com" title="Docs">docs</a> <img alt="a" src="/media/a.png"></p>'
+        )
@@ -0,0 +1,35 @@
+from createthon.throttling import SlidingWindowThrottle
+
+
+class PerUserBucket:
+    """One bucket per authenticated user"""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class GlobalBucket:
+    """One bucket shared by every user"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+
+class StartUserThrottle(PerUserBucket, SlidingWindowThrottle):
+    scope = 'challenge_start_user'
+
+
+class StartGlobalThrottle(GlobalBucket, SlidingWindowThrottle):
+    scope = 'challenge_start_global'
+
+
+class SubmitUserThrottle(PerUserBucket, SlidingWindowThrottle):
+    scope = 'challenge_submit_user'
+
+
+class SubmitGlobalThrottle(GlobalBucket, SlidingWindowThrottle):
+    scope = 'challenge_submit_global'
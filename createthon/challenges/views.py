@@ -1,21 +1,43 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Q, Count, Sum
+import hashlib
+from django.db import transaction
+from django.db.models import Q, F
+from django.contrib.auth.models import User
 
-from challenges.models import Category, Challenge, Comment, ChallengeTag
-from progress.models import UserProgress, Leaderboard
+from challenges.models import Category, Challenge, Comment, ChallengeTag, ChallengeAnalytics
+from challenges.idempotency import idempotent
+from challenges.tag_index import challenge_index
+from challenges.recommendations import challenge_recommender
+from createthon.images import variant_urls
+from createthon.db_router import ReplicaReadMixin
+from challenges.throttling import (
+    StartUserThrottle,
+    StartGlobalThrottle,
+    SubmitUserThrottle,
+    SubmitGlobalThrottle
+)
+from progress.models import UserProgress, DailyActivity
+from progress.submissions import record_submission, enqueue_submission, check_admission, validate_inline
+from progress.plagiarism import near_duplicates, challenge_near_duplicates
+from progress.heartbeats import heartbeat_buffer
 from challenges.serializers import (
     CategorySerializer, 
     ChallengeSerializer,
     ChallengeDetailSerializer,
     CommentSerializer,
-    ChallengeTagSerializer
+    ChallengeTagSerializer,
+    ChallengeAnalyticsSerializer
 )
-from progress.serializers import UserProgressSerializer, LeaderboardSerializer
+from progress.serializers import UserProgressSerializer
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for handling Category operations"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -24,47 +46,69 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['GET'])
     def with_challenge_count(self, request):
         """Return categories with challenge counts"""
-        categories = Category.objects.annotate(challenge_count=Count('challenge'))
+        # Counts are maintained on the row by signals, so no join or GROUP BY here
+        categories = Category.objects.all()
         data = [{
             'id': category.id,
             'name': category.name,
             'description': category.description,
             'icon': category.icon.url if category.icon else None,
-            'challenge_count': category.challenge_count
+            'icon_variants': variant_urls(category.icon_variants),
+            'challenge_count': category.published_challenge_count,
+            'total_challenge_count': category.challenge_count
         } for category in categories]
         return Response(data)
 
-class ChallengeTagViewSet(viewsets.ModelViewSet):
+class ChallengeTagViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for handling Challenge Tags"""
     queryset = ChallengeTag.objects.all()
     serializer_class = ChallengeTagSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ChallengeViewSet(viewsets.ModelViewSet):
+class ChallengeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for handling Challenge operations with additional custom actions"""
     queryset = Challenge.objects.filter(status='published')
     serializer_class = ChallengeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Heartbeats are buffered and flushed later, so there is nothing to read back
+    unpinned_write_actions = ('heartbeat',)
     
     def get_serializer_class(self):
         if self.action == 'retrieve' or self.action == 'challenge_details':
             return ChallengeDetailSerializer
         return ChallengeSerializer
 
+    def _index_filters(self):
+        """Structured filters from the query string, in ChallengeIndex.query() terms"""
+        params = self.request.query_params
+        return {
+            'difficulty': params.get('difficulty'),
+            'category': params.get('category'),
+            'any_tags': params.getlist('tags'),
+            'all_tags': params.getlist('tags_all'),
+            'not_tags': params.getlist('tags_not')
+        }
+
+    def _search_ids(self, search):
+        return Challenge.objects.filter(status='published').filter(
+            Q(title__icontains=search) | 
+            Q(description__icontains=search)
+        ).values_list('id', flat=True)
+
     def get_queryset(self):
-        """Optionally filter challenges by difficulty, category, or tags"""
+        """
+        Optionally filter challenges by difficulty, category, or tags.
+        `tags` matches any of the given tags, `tags_all` requires every one
+        and `tags_not` excludes them.
+        """
         queryset = Challenge.objects.filter(status='published')
-        difficulty = self.request.query_params.get('difficulty')
-        category = self.request.query_params.get('category')
-        tags = self.request.query_params.getlist('tags')
+        filters = self._index_filters()
         search = self.request.query_params.get('search')
 
-        if difficulty:
-            queryset = queryset.filter(difficulty=difficulty)
-        if category:
-            queryset = queryset.filter(category__id=category)
-        if tags:
-            queryset = queryset.filter(tags__name__in=tags).distinct()
+        if any(filters.values()):
+            # Resolve the structured filters from the in-memory bitmaps instead of joins
+            index = challenge_index.refresh()
+            queryset = queryset.filter(id__in=index.to_ids(index.query(**filters)))
         if search:
             queryset = queryset.filter(
                 Q(title__icontains=search) | 
@@ -73,6 +117,137 @@ class ChallengeViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['GET'])
+    def facets(self, request):
+        """
+        Matching challenges plus counts per difficulty, category and tag for the
+        current filters. Each facet is counted with its own filter left out, so
+        the counts show what selecting another value would return.
+        """
+        index = challenge_index.refresh()
+        filters = self._index_filters()
+        search = request.query_params.get('search')
+
+        cache_key = 'challenge-facets:{}:{}'.format(
+            index.version,
+            hashlib.sha256(request.query_params.urlencode().encode()).hexdigest()
+        )
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        scope = index.from_ids(self._search_ids(search)) if search else index.all
+        matches = index.query(**filters) & scope
+
+        def without(name):
+            empty = [] if name.endswith('tags') else None
+            return index.query(**{**filters, name: empty}) & scope
+
+        by_difficulty = without('difficulty')
+        by_category = without('category')
+        by_tag = without('any_tags')
+
+        category_names = dict(Category.objects.values_list('id', 'name'))
+        challenges = self.get_serializer(
+            Challenge.objects.filter(id__in=index.to_ids(matches)).select_related('category').prefetch_related('tags'),
+            many=True
+        )
+        data = {
+            'count': matches.bit_count(),
+            'results': challenges.data,
+            'facets': {
+                'difficulty': {
+                    value: (by_difficulty & bitmap).bit_count()
+                    for value, bitmap in index.by_difficulty.items()
+                },
+                'category': [
+                    {
+                        'id': category_id,
+                        'name': category_names.get(category_id),
+                        'count': (by_category & bitmap).bit_count()
+                    }
+                    for category_id, bitmap in index.by_category.items()
+                ],
+                'tags': {
+                    name: (by_tag & bitmap).bit_count()
+                    for name, bitmap in index.by_tag.items()
+                }
+            }
+        }
+        cache.set(cache_key, data, getattr(settings, 'CHALLENGE_FACETS_CACHE_TIMEOUT', 300))
+        return Response(data)
+
+    @action(detail=False, methods=['GET'])
+    def recommended(self, request):
+        """
+        Unsolved challenges ranked by their similarity to what the user has
+        completed, weighted towards their difficulty level and favourite categories
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a whole number.'})
+        completed = UserProgress.objects.filter(
+            user=request.user,
+            status='completed'
+        ).values_list('challenge_id', flat=True)
+
+        basis, picks = challenge_recommender.refresh().recommend(list(completed), limit)
+        challenges = Challenge.objects.filter(
+            id__in=[challenge_id for challenge_id, _ in picks]
+        ).select_related('category').prefetch_related('tags').in_bulk()
+        ordered = [challenges[challenge_id] for challenge_id, _ in picks if challenge_id in challenges]
+
+        return Response({
+            'basis': basis,
+            'results': self.get_serializer(ordered, many=True).data
+        })
+
+    @action(detail=False, methods=['GET'], permission_classes=[permissions.IsAdminUser])
+    def analytics(self, request):
+        """
+        Staff-only per-challenge statistics, as last computed by the
+        compute_challenge_analytics job. Filter with ?challenge=<id> (repeatable).
+        """
+        analytics = ChallengeAnalytics.objects.select_related('challenge').order_by('challenge_id')
+        challenge_ids = [i for i in request.query_params.getlist('challenge') if i.isdigit()]
+        if challenge_ids:
+            analytics = analytics.filter(challenge_id__in=challenge_ids)
+        return Response(ChallengeAnalyticsSerializer(analytics, many=True).data)
+
+    @action(detail=False, methods=['GET'], permission_classes=[permissions.IsAdminUser], url_path='near-duplicates')
+    def near_duplicates(self, request):
+        """
+        Staff-only plagiarism candidates: submissions by other users similar to
+        ?submission=<id>, or every group of users with near-duplicate submissions
+        to ?challenge=<id>. ?threshold= overrides the minimum estimated similarity.
+        """
+        params = request.query_params
+        threshold = params.get('threshold')
+        if threshold is not None:
+            try:
+                threshold = float(threshold)
+            except ValueError:
+                threshold = -1
+            if not 0 <= threshold <= 1:
+                raise ValidationError({'threshold': 'Must be a number between 0 and 1.'})
+
+        if params.get('submission', '').isdigit():
+            matches = near_duplicates(int(params['submission']), threshold)
+            if matches is None:
+                return Response({'message': 'Submission not indexed yet'}, status=404)
+            user_ids = {match['user'] for match in matches}
+            result = {'submission': int(params['submission']), 'matches': matches}
+        elif params.get('challenge', '').isdigit():
+            groups = challenge_near_duplicates(int(params['challenge']), threshold)
+            user_ids = {user_id for group in groups for user_id in group['users']}
+            result = {'challenge': int(params['challenge']), 'groups': groups}
+        else:
+            raise ValidationError({'detail': 'Pass a submission or challenge id.'})
+
+        result['usernames'] = dict(User.objects.filter(id__in=user_ids).values_list('id', 'username'))
+        return Response(result)
+
     @action(detail=True, methods=['GET'], url_path='challenge-details')
     def challenge_details(self, request, pk=None):
         """Fetch challenge details with user progress"""
@@ -90,102 +265,98 @@ class ChallengeViewSet(viewsets.ModelViewSet):
             'user_progress': progress_data
         })
 
-    @action(detail=True, methods=['POST'])
+    @action(detail=True, methods=['POST'], throttle_classes=[StartUserThrottle, StartGlobalThrottle])
+    @idempotent
     def start_challenge(self, request, pk=None):
         """Custom action to start a challenge for the current user"""
         challenge = self.get_object()
-        user_progress, created = UserProgress.objects.get_or_create(
-            user=request.user, 
-            challenge=challenge,
-            defaults={'status': 'started', 'start_time': timezone.now()}
-        )
 
-        if not created and user_progress.status != 'completed':
-            user_progress.attempts += 1
-            user_progress.save()
+        with transaction.atomic():
+            # Count a restart in place; the row is only inserted on the first start
+            restarted = UserProgress.objects.filter(
+                user=request.user,
+                challenge=challenge
+            ).exclude(
+                status='completed'
+            ).update(
+                attempts=F('attempts') + 1,
+                last_attempt_time=timezone.now()
+            )
+
+            if restarted:
+                user_progress = UserProgress.objects.get(user=request.user, challenge=challenge)
+            else:
+                user_progress, created = UserProgress.objects.get_or_create(
+                    user=request.user,
+                    challenge=challenge,
+                    defaults={'status': 'started', 'start_time': timezone.now()}
+                )
+                if not created:
+                    # A parallel first start inserted the row after our update; count this one as a restart
+                    UserProgress.objects.filter(pk=user_progress.pk).exclude(
+                        status='completed'
+                    ).update(
+                        attempts=F('attempts') + 1,
+                        last_attempt_time=timezone.now()
+                    )
+                    user_progress.refresh_from_db()
 
+        DailyActivity.record(request.user, 'started')
         serializer = UserProgressSerializer(user_progress)
         return Response(serializer.data)
 
-    @action(detail=True, methods=['POST'])
+    @action(detail=True, methods=['POST'], throttle_classes=[SubmitUserThrottle, SubmitGlobalThrottle])
+    @idempotent
     def submit_challenge(self, request, pk=None):
         """Submit a challenge solution"""
+        check_admission()
         challenge = self.get_object()
         submission_code = request.data.get('submission_code', '')
-        time_spent = request.data.get('time_spent', 0)
+        time_spent = int(request.data.get('time_spent', 0))
 
-        # Get or create user progress
-        user_progress, created = UserProgress.objects.get_or_create(
-            user=request.user, 
-            challenge=challenge,
-            defaults={'status': 'started', 'start_time': timezone.now()}
-        )
+        if self._wants_async(request):
+            # Persist the attempt now and leave validation to the worker pool
+            submission, _ = record_submission(request.user, challenge, submission_code, time_spent)
+            enqueue_submission(submission)
+            return Response({
+                'submission_id': submission.id,
+                'status': submission.status,
+                'result_url': reverse('submission-result', args=[submission.id], request=request)
+            }, status=status.HTTP_202_ACCEPTED)
 
-        # Update progress
-        user_progress.status = 'submitted'
-        user_progress.submission_code = submission_code
-        user_progress.time_spent += int(time_spent)  # Accumulate time spent
-        user_progress.attempts += 1
-        user_progress.last_attempt_time = timezone.now()
-        user_progress.save()
-        
-        # Validate submission
-        validation_result = challenge.validate_submission(submission_code)
-        
-        # Update status based on validation
-        if validation_result['passed']:
-            previous_status = user_progress.status
-            user_progress.mark_completed()
-            
-            # Only update leaderboard if this is the first time completing the challenge
-            if previous_status != 'completed':
-                # Update leaderboard
-                self._update_user_leaderboard(request.user)
-        else:
-            user_progress.status = 'failed'
-            user_progress.save()
+        validation_result = validate_inline(challenge, submission_code)
+        _, user_progress = record_submission(
+            request.user, challenge, submission_code, time_spent, validation_result
+        )
 
         serializer = UserProgressSerializer(user_progress)
         return Response({
             'user_progress': serializer.data,
             'validation_result': validation_result
         })
+
+    def _wants_async(self, request):
+        """Whether the client asked for (or the server defaults to) async submission"""
+        value = request.query_params.get('async', request.data.get('async'))
+        if value is None:
+            return getattr(settings, 'SUBMISSION_ASYNC_DEFAULT', False)
+        return str(value).lower() in ('1', 'true', 'yes')
     
-    def _update_user_leaderboard(self, user):
-        """Update a specific user's leaderboard entry"""
-        # Calculate total points
-        total_points = UserProgress.objects.filter(
-            user=user,
-            status='completed'
-        ).aggregate(
-            total=Sum('challenge__points')
-        )['total'] or 0
-        
-        # Count completed challenges
-        challenges_completed = UserProgress.objects.filter(
-            user=user,
-            status='completed'
-        ).count()
-        
-        # Update or create leaderboard entry
-        leaderboard, _ = Leaderboard.objects.get_or_create(user=user)
-        leaderboard.total_points = total_points
-        leaderboard.challenges_completed = challenges_completed
-        leaderboard.save()
-        
-        # Update rankings for all users
-        self._update_leaderboard_rankings()
-    
-    def _update_leaderboard_rankings(self):
-        """Update rankings on the leaderboard"""
-        # First order by points, then by number of challenges completed (for tie-breaking)
-        leaderboards = Leaderboard.objects.all().order_by('-total_points', '-challenges_completed')
-        
-        for i, leaderboard in enumerate(leaderboards):
-            if leaderboard.ranking != i + 1:  # Only update if ranking changed
-                leaderboard.ranking = i + 1
-                leaderboard.save()
-    
+    @action(detail=True, methods=['POST'])
+    def heartbeat(self, request, pk=None):
+        """Record editor time on a started challenge; buffered and flushed in batches"""
+        try:
+            challenge_id = int(pk)
+            seconds = int(request.data.get('seconds', 0))
+        except (TypeError, ValueError):
+            return Response({'error': 'seconds must be a whole number'}, status=400)
+
+        # No lookup here: heartbeats for unknown or unstarted challenges are dropped at flush
+        seconds = min(max(seconds, 0), getattr(settings, 'HEARTBEAT_MAX_SECONDS', 60))
+        if seconds:
+            heartbeat_buffer.add((request.user.pk, challenge_id), seconds)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=True, methods=['POST'])
     def add_comment(self, request, pk=None):
         """Add a comment to a challenge"""
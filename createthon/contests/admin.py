@@ -0,0 +1,7 @@
+from django.contrib import admin
+from contests.models import Contest,ContestScore,ContestSnapshot,ContestSubmissionLog
+
+admin.site.register(Contest)
+admin.site.register(ContestScore)
+admin.site.register(ContestSnapshot)
+admin.site.register(ContestSubmissionLog)
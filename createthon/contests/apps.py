@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ContestsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'contests'
+
+    def ready(self):
+        import contests.signals  # noqa: F401
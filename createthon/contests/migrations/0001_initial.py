@@ -0,0 +1,81 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('challenges', '0006_image_variants'),
+        ('progress', '0006_leaderboard_buckets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('freeze_time', models.DateTimeField(blank=True, null=True)),
+                ('unfrozen_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('challenges', models.ManyToManyField(related_name='contests', to='challenges.challenge')),
+            ],
+            options={
+                'ordering': ['-start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContestSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('standings', models.JSONField()),
+                ('taken_at', models.DateTimeField(auto_now_add=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='contests.contest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContestScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('solved', models.IntegerField(default=0)),
+                ('penalty_seconds', models.IntegerField(default=0)),
+                ('last_solve_at', models.DateTimeField(blank=True, null=True)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='contests.contest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contest', '-points', 'penalty_seconds'], name='contests_co_contest_ca9473_idx')],
+                'unique_together': {('contest', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ContestSubmissionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('passed', models.BooleanField()),
+                ('first_solve', models.BooleanField(default=False)),
+                ('deferred', models.BooleanField(default=False, help_text='Logged while frozen; scored at unfreeze')),
+                ('points', models.IntegerField(default=0)),
+                ('penalty_seconds', models.IntegerField(default=0)),
+                ('submitted_at', models.DateTimeField()),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='challenges.challenge')),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log', to='contests.contest')),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='progress.submission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contest', 'user', 'challenge'], name='contests_co_contest_be58e3_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('first_solve', True)), fields=('contest', 'user', 'challenge'), name='contest_log_one_first_solve')],
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from challenges.models import Challenge
+from progress.models import Submission
+
+
+class Contest(models.Model):
+    """
+    A time-boxed set of challenges with its own scoreboard. From freeze_time
+    until the contest is unfrozen the public board shows a snapshot taken at
+    the freeze, and new solves are only logged.
+    """
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    challenges = models.ManyToManyField(Challenge, related_name='contests')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    freeze_time = models.DateTimeField(null=True, blank=True)
+    unfrozen_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start_time']
+
+    def __str__(self):
+        return self.name
+
+    def is_running(self, at=None):
+        at = at or timezone.now()
+        return self.start_time <= at < self.end_time
+
+    def is_frozen(self, at=None):
+        at = at or timezone.now()
+        return (
+            self.freeze_time is not None
+            and self.freeze_time <= at
+            and self.unfrozen_at is None
+        )
+
+
+class ContestSubmissionLog(models.Model):
+    """
+    Append-only record of every judged submission made to a running contest.
+    Rows are never updated; scores are derived from them.
+    """
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='log')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, blank=True)
+    passed = models.BooleanField()
+    first_solve = models.BooleanField(default=False)
+    deferred = models.BooleanField(default=False, help_text="Logged while frozen; scored at unfreeze")
+    points = models.IntegerField(default=0)
+    penalty_seconds = models.IntegerField(default=0)
+    submitted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['contest', 'user', 'challenge'])
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['contest', 'user', 'challenge'],
+                condition=models.Q(first_solve=True),
+                name='contest_log_one_first_solve'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} on {self.challenge.title} in {self.contest.name}"
+
+
+class ContestScore(models.Model):
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='scores')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    points = models.IntegerField(default=0)
+    solved = models.IntegerField(default=0)
+    penalty_seconds = models.IntegerField(default=0)
+    last_solve_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('contest', 'user')
+        indexes = [
+            models.Index(fields=['contest', '-points', 'penalty_seconds'])
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s score in {self.contest.name}"
+
+
+class ContestSnapshot(models.Model):
+    """Standings frozen at the start of a contest's freeze; never modified"""
+    contest = models.OneToOneField(Contest, on_delete=models.CASCADE, related_name='snapshot')
+    standings = models.JSONField()
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.contest.name} standings at {self.taken_at}"
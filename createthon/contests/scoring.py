@@ -0,0 +1,221 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from contests.models import Contest, ContestScore, ContestSnapshot, ContestSubmissionLog
+
+
+def _board_key(contest_id):
+    return f'contest-board:{contest_id}'
+
+
+def log_submission(submission, passed):
+    """Append a judged submission to the log of every running contest that includes its challenge"""
+    contests = Contest.objects.filter(
+        challenges=submission.challenge_id,
+        start_time__lte=submission.submitted_at,
+        end_time__gt=submission.submitted_at
+    )
+    for contest in contests:
+        entry = _append(contest, submission, passed)
+        if not entry.first_solve:
+            continue
+        # Solves logged during the freeze are left for the unfreeze batch, unless it already ran
+        if entry.deferred and _awaiting_unfreeze(contest):
+            continue
+        refresh_score(contest.pk, submission.user_id)
+
+
+def _awaiting_unfreeze(contest):
+    """
+    Whether the unfreeze batch has yet to run. An unfreeze holds the contest
+    row until its batch commits, so locking the row here either waits and sees
+    unfrozen_at set, or lets the batch start only after this entry is logged.
+    """
+    with transaction.atomic():
+        return Contest.objects.select_for_update().filter(pk=contest.pk, unfrozen_at__isnull=True).exists()
+
+
+def _append(contest, submission, passed):
+    entry = ContestSubmissionLog(
+        contest=contest,
+        user_id=submission.user_id,
+        challenge_id=submission.challenge_id,
+        submission=submission,
+        passed=passed,
+        deferred=contest.is_frozen(submission.submitted_at),
+        submitted_at=submission.submitted_at
+    )
+    if not passed:
+        entry.save()
+        return entry
+
+    wrong_attempts = ContestSubmissionLog.objects.filter(
+        contest=contest,
+        user_id=submission.user_id,
+        challenge_id=submission.challenge_id,
+        passed=False,
+        submitted_at__lt=submission.submitted_at
+    ).count()
+    entry.first_solve = True
+    entry.points = submission.challenge.points
+    entry.penalty_seconds = (
+        int((submission.submitted_at - contest.start_time).total_seconds())
+        + wrong_attempts * getattr(settings, 'CONTEST_WRONG_ATTEMPT_PENALTY', 1200)
+    )
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        # Already solved: keep the attempt in the log without scoring it again
+        entry.first_solve = False
+        entry.points = entry.penalty_seconds = 0
+        entry.save()
+    return entry
+
+
+def _scored_entries(contest):
+    """Log rows that count towards the board; solves made during a freeze wait for the unfreeze"""
+    entries = ContestSubmissionLog.objects.filter(contest=contest, first_solve=True)
+    if contest.is_frozen():
+        entries = entries.filter(deferred=False)
+    return entries
+
+
+SCORE_TOTALS = {
+    'points': Sum('points'),
+    'solved': Count('id'),
+    'penalty_seconds': Sum('penalty_seconds'),
+    'last_solve_at': Max('submitted_at')
+}
+
+
+def refresh_score(contest_id, user_id):
+    """
+    Recompute one user's score from the log. The score row is locked first, so
+    concurrent solves by the same user apply in turn and none is counted twice.
+    """
+    contest = Contest.objects.get(pk=contest_id)
+    with transaction.atomic():
+        ContestScore.objects.get_or_create(contest=contest, user_id=user_id)
+        score = ContestScore.objects.select_for_update().get(contest=contest, user_id=user_id)
+        totals = _scored_entries(contest).filter(user_id=user_id).aggregate(**SCORE_TOTALS)
+        score.points = totals['points'] or 0
+        score.solved = totals['solved']
+        score.penalty_seconds = totals['penalty_seconds'] or 0
+        score.last_solve_at = totals['last_solve_at']
+        score.save()
+
+
+def standings(contest):
+    """Ranked scoreboard rows for a contest"""
+    scores = ContestScore.objects.filter(
+        contest=contest,
+        solved__gt=0
+    ).select_related('user').order_by('-points', 'penalty_seconds', 'last_solve_at', 'user_id')
+    return [
+        {
+            'rank': i + 1,
+            'user': {
+                'id': score.user.id,
+                'username': score.user.username,
+                'first_name': score.user.first_name,
+                'last_name': score.user.last_name
+            },
+            'points': score.points,
+            'solved': score.solved,
+            'penalty_seconds': score.penalty_seconds
+        }
+        for i, score in enumerate(scores)
+    ]
+
+
+def take_snapshot(contest):
+    """The contest's frozen standings, captured the first time they are asked for"""
+    # While frozen the scores only include solves from before the freeze, so a
+    # snapshot taken at any point during the freeze shows the same board
+    snapshot, _ = ContestSnapshot.objects.get_or_create(
+        contest=contest,
+        defaults={'standings': standings(contest)}
+    )
+    return snapshot
+
+
+def scoreboard(contest_id):
+    """
+    Scoreboard payload, answered from the cache without touching the database.
+    A frozen board comes from the immutable snapshot and is cached for
+    CONTEST_FROZEN_SCOREBOARD_CACHE_TIMEOUT seconds, or until the unfreeze; a
+    live board is cached for CONTEST_SCOREBOARD_CACHE_TIMEOUT seconds.
+    Raises Contest.DoesNotExist for an unknown contest.
+    """
+    key = _board_key(contest_id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    contest = Contest.objects.get(pk=contest_id)
+    if contest.is_frozen():
+        snapshot = take_snapshot(contest)
+        data = {'frozen': True, 'as_of': snapshot.taken_at, 'standings': snapshot.standings}
+        # Bounded as well, so the board goes live even if an unfreeze's delete is missed
+        cache.set(key, data, getattr(settings, 'CONTEST_FROZEN_SCOREBOARD_CACHE_TIMEOUT', 60))
+    else:
+        data = {'frozen': False, 'as_of': timezone.now(), 'standings': standings(contest)}
+        cache.set(key, data, getattr(settings, 'CONTEST_SCOREBOARD_CACHE_TIMEOUT', 5))
+    return data
+
+
+def freeze(contest):
+    """Freeze the board now, unless a freeze time is already set"""
+    if contest.freeze_time is None or contest.freeze_time > timezone.now():
+        contest.freeze_time = timezone.now()
+        contest.save(update_fields=['freeze_time'])
+    if contest.is_frozen():
+        take_snapshot(contest)
+        cache.delete(_board_key(contest.pk))
+    return contest
+
+
+def unfreeze(contest):
+    """Score everything logged during the freeze in one batch and publish the board"""
+    with transaction.atomic():
+        contest = Contest.objects.select_for_update().get(pk=contest.pk)
+        if contest.unfrozen_at is None:
+            contest.unfrozen_at = timezone.now()
+            contest.save(update_fields=['unfrozen_at'])
+            resolve(contest)
+    return contest
+
+
+def resolve(contest):
+    """Recompute every score in the contest from the log in one batch"""
+    with transaction.atomic():
+        # Hold every score row while the batch is written so a concurrent solve waits for it
+        scores = {
+            score.user_id: score
+            for score in ContestScore.objects.select_for_update().filter(contest=contest)
+        }
+        for score in scores.values():
+            score.points = score.solved = score.penalty_seconds = 0
+            score.last_solve_at = None
+        for totals in _scored_entries(contest).values('user_id').annotate(**SCORE_TOTALS).order_by():
+            score = scores.get(totals['user_id']) or ContestScore(contest=contest, user_id=totals['user_id'])
+            score.points = totals['points'] or 0
+            score.solved = totals['solved']
+            score.penalty_seconds = totals['penalty_seconds'] or 0
+            score.last_solve_at = totals['last_solve_at']
+            scores[totals['user_id']] = score
+
+        ContestScore.objects.bulk_update(
+            [score for score in scores.values() if score.pk],
+            ['points', 'solved', 'penalty_seconds', 'last_solve_at']
+        )
+        ContestScore.objects.bulk_create(
+            [score for score in scores.values() if not score.pk],
+            ignore_conflicts=True
+        )
+
+    transaction.on_commit(lambda: cache.delete(_board_key(contest.pk)))
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from contests.models import Contest
+from challenges.models import Challenge
+
+class ContestSerializer(serializers.ModelSerializer):
+    challenges = serializers.PrimaryKeyRelatedField(queryset=Challenge.objects.all(), many=True)
+    is_frozen = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Contest
+        fields = [
+            'id', 'name', 'description', 'challenges', 'start_time',
+            'end_time', 'freeze_time', 'unfrozen_at', 'is_frozen'
+        ]
+        read_only_fields = ['unfrozen_at']
+
+    def get_is_frozen(self, obj):
+        return obj.is_frozen()
+
+    def validate(self, data):
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        freeze_time = data.get('freeze_time', getattr(self.instance, 'freeze_time', None))
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError({'end_time': 'Must be after start_time'})
+        if freeze_time and not (start_time <= freeze_time <= end_time):
+            raise serializers.ValidationError({'freeze_time': 'Must fall between start_time and end_time'})
+        return data
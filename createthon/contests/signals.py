@@ -0,0 +1,9 @@
+from django.dispatch import receiver
+
+from contests.scoring import log_submission
+from progress.signals import submission_judged
+
+
+@receiver(submission_judged)
+def log_contest_submission(sender, submission, passed, **kwargs):
+    log_submission(submission, passed)
@@ -0,0 +1,138 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from challenges.models import Category, Challenge
+from contests import scoring
+from contests.models import Contest, ContestScore
+from progress.models import CodeBlob, Submission
+from progress.signals import submission_judged
+
+
+class ContestFixtureMixin:
+    def make_contest(self):
+        cache.clear()
+        now = timezone.now()
+        self.challenge = Challenge.objects.create(
+            title='Sum', description='Add numbers', difficulty='beginner', points=10,
+            category=Category.objects.create(name='Python'), status='published'
+        )
+        self.contest = Contest.objects.create(
+            name='Sprint', start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1)
+        )
+        self.contest.challenges.add(self.challenge)
+        self.staff = APIClient()
+        self.staff.force_authenticate(User.objects.create_superuser('staff', 'staff@example.com', 'x'))
+
+    def solve(self, user, submitted_at=None):
+        submission = Submission.objects.create(
+            user=user, challenge=self.challenge, blob=CodeBlob.store('print(1)'),
+            status='done', passed=True, submitted_at=submitted_at or timezone.now()
+        )
+        submission_judged.send(sender=Submission, submission=submission, passed=True)
+        return submission
+
+    def board(self):
+        response = self.staff.get(f'/contests/contests/{self.contest.pk}/scoreboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['frozen'], [(row['user']['username'], row['solved']) for row in response.data['standings']]
+
+
+class ContestFreezeTests(ContestFixtureMixin, TestCase):
+    """Solves made during a freeze stay off the board until the unfreeze scores them"""
+
+    def setUp(self):
+        self.make_contest()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'x')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'x')
+        self.solve(self.alice)
+        self.assertEqual(self.staff.post(f'/contests/contests/{self.contest.pk}/freeze/').status_code, 200)
+
+    def test_solve_during_freeze_is_hidden(self):
+        self.solve(self.bob)
+
+        self.assertEqual(self.board(), (True, [('alice', 1)]))
+        # Not just a stale cache: bob has not been scored at all
+        cache.clear()
+        self.assertEqual(self.board(), (True, [('alice', 1)]))
+        self.assertFalse(ContestScore.objects.filter(contest=self.contest, user=self.bob, solved__gt=0).exists())
+
+    def test_solve_during_freeze_appears_after_unfreeze(self):
+        self.solve(self.bob)
+        self.board()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.staff.post(f'/contests/contests/{self.contest.pk}/unfreeze/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board(), (False, [('alice', 1), ('bob', 1)]))
+
+    def test_solve_logged_as_the_unfreeze_runs_is_scored_once(self):
+        real = scoring._awaiting_unfreeze
+
+        def unfreeze_first(contest):
+            # The batch commits between the solve being logged and its check
+            scoring.unfreeze(contest)
+            return real(contest)
+
+        with mock.patch.object(scoring, '_awaiting_unfreeze', unfreeze_first):
+            self.solve(self.bob)
+        self.solve(self.bob)
+
+        score = ContestScore.objects.get(contest=self.contest, user=self.bob)
+        self.assertEqual((score.solved, score.points), (1, 10))
+
+    def test_solve_made_before_the_unfreeze_but_judged_after_is_scored_once(self):
+        during_freeze = timezone.now()
+        scoring.unfreeze(self.contest)
+
+        self.solve(self.bob, submitted_at=during_freeze)
+        # Running the batch again recomputes from the log rather than adding to it
+        scoring.resolve(Contest.objects.get(pk=self.contest.pk))
+
+        score = ContestScore.objects.get(contest=self.contest, user=self.bob)
+        self.assertEqual((score.solved, score.points), (1, 10))
+
+
+class ContestUnfreezeRaceTests(ContestFixtureMixin, TransactionTestCase):
+    """Solves judged concurrently with the unfreeze are each scored exactly once"""
+
+    def test_concurrent_solves_and_unfreeze(self):
+        self.make_contest()
+        users = [User.objects.create_user(f'racer{i}', f'racer{i}@example.com', 'x') for i in range(8)]
+        scoring.freeze(self.contest)
+        start = threading.Barrier(len(users) + 1)
+
+        def solve(user):
+            start.wait()
+            try:
+                self.solve(user)
+            finally:
+                connection.close()
+
+        def unfreeze():
+            start.wait()
+            try:
+                scoring.unfreeze(Contest.objects.get(pk=self.contest.pk))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=solve, args=(user,)) for user in users]
+        threads.append(threading.Thread(target=unfreeze))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        scores = ContestScore.objects.filter(contest=self.contest)
+        self.assertEqual(sorted(scores.values_list('solved', flat=True)), [1] * len(users))
+        frozen, standings = self.board()
+        self.assertFalse(frozen)
+        self.assertCountEqual(standings, [(user.username, 1) for user in users])
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from contests.views import ContestViewSet
+
+router = DefaultRouter()
+router.register(r'contests', ContestViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,43 @@
+from django.http import Http404
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from contests import scoring
+from contests.models import Contest
+from contests.serializers import ContestSerializer
+from createthon.db_router import ReplicaReadMixin
+
+class ContestViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    """ViewSet for contests; staff manage them, everyone signed in can follow the scoreboard"""
+    queryset = Contest.objects.all().prefetch_related('challenges')
+    serializer_class = ContestSerializer
+
+    def get_permissions(self):
+        if self.action in ('list', 'retrieve', 'scoreboard'):
+            return [permissions.IsAuthenticated()]
+        return [permissions.IsAdminUser()]
+
+    @action(detail=True, methods=['GET'])
+    def scoreboard(self, request, pk=None):
+        """Contest standings; a snapshot from the freeze while the board is frozen"""
+        # Served straight from the cache, so reads stay cheap at the end of a contest
+        try:
+            return Response(scoring.scoreboard(int(pk)))
+        except (ValueError, Contest.DoesNotExist):
+            raise Http404
+
+    @action(detail=True, methods=['POST'])
+    def freeze(self, request, pk=None):
+        """Freeze the scoreboard now"""
+        contest = scoring.freeze(self.get_object())
+        return Response(self.get_serializer(contest).data)
+
+    @action(detail=True, methods=['POST'])
+    def unfreeze(self, request, pk=None):
+        """Score the solves logged during the freeze in one batch and show the final board"""
+        contest = scoring.unfreeze(self.get_object())
+        return Response({
+            'contest': self.get_serializer(contest).data,
+            'scoreboard': scoring.scoreboard(contest.pk)
+        })
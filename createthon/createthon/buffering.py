@@ -0,0 +1,63 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """
+    Collects keyed writes in memory and flushes them from a background thread.
+
+    Subclasses implement `write()` for a batch of pending values and may
+    override `combine()` to merge repeated writes to the same key. Whatever is
+    still buffered when the process exits is flushed by an atexit hook.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        atexit.register(self.flush)
+
+    def combine(self, current, value):
+        """Merge a new value into the one already buffered for its key"""
+        return value
+
+    def write(self, pending):
+        raise NotImplementedError
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._pending:
+                value = self.combine(self._pending[key], value)
+            self._pending[key] = value
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write everything buffered so far"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.write(pending)
+        except Exception:
+            logger.exception("Buffered flush failed, keeping %d entries for retry", len(pending))
+            with self._lock:
+                for key, value in pending.items():
+                    if key in self._pending:
+                        value = self.combine(value, self._pending[key])
+                    self._pending[key] = value
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            self.flush()
@@ -0,0 +1,156 @@
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Per-request routing flag; asgiref's Local keeps it separate per thread and per async task
+_routing = Local()
+
+
+class ReplicaPool:
+    """
+    Round-robin over the aliases in DATABASE_REPLICAS, skipping any replica
+    whose last health check failed until it has been re-checked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._healthy = {}
+        self._cycle = None
+        self._aliases = None
+
+    @property
+    def aliases(self):
+        return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+    @property
+    def check_interval(self):
+        return getattr(settings, 'DATABASE_REPLICA_CHECK_INTERVAL', 10)
+
+    def _check(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except DatabaseError:
+            logger.warning("Replica %s failed its health check, reading from %s", alias, DEFAULT_DB_ALIAS)
+            connections[alias].close()
+            return False
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            fresh = now - self._checked.get(alias, float('-inf')) < self.check_interval
+        if fresh:
+            return self._healthy[alias]
+        healthy = self._check(alias)
+        with self._lock:
+            self._checked[alias] = now
+            self._healthy[alias] = healthy
+        return healthy
+
+    def choose(self):
+        """A healthy replica alias, or None when there is none"""
+        aliases = self.aliases
+        if not aliases:
+            return None
+        with self._lock:
+            if aliases != self._aliases:
+                self._aliases = aliases
+                self._cycle = itertools.cycle(aliases)
+            candidates = [next(self._cycle) for _ in aliases]
+        for alias in candidates:
+            if self.is_healthy(alias):
+                return alias
+        return None
+
+    def reset(self):
+        """Forget health results so every replica is re-checked"""
+        with self._lock:
+            self._checked.clear()
+            self._healthy.clear()
+
+
+replica_pool = ReplicaPool()
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a replica while the current request has opted in through
+    ReplicaReadMixin; everything else, and every write, uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_routing, 'use_replica', False):
+            return None
+        # The shared cache table carries version stamps and read-your-writes pins,
+        # which a lagging replica would serve stale
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction on the primary must see its uncommitted writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica_pool.choose()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any of them may be related
+        return True
+
+
+def _sticky_key(user):
+    return f'db-primary-sticky:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Send this user's reads to the primary for DATABASE_READ_STICKY_SECONDS"""
+    cache.set(_sticky_key(user), True, getattr(settings, 'DATABASE_READ_STICKY_SECONDS', 10))
+
+
+def is_pinned_to_primary(user):
+    return user.is_authenticated and bool(cache.get(_sticky_key(user)))
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin that serves safe-method requests from a replica. After a
+    user's successful write their reads stay on the primary for a short window,
+    so they always see what they just submitted. Actions listed in
+    primary_read_actions (e.g. polling for a worker's result) always use the
+    primary; unsafe actions listed in unpinned_write_actions (e.g. buffered
+    heartbeats that write nothing during the request) do not pin the user.
+    """
+    primary_read_actions = ()
+    unpinned_write_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication runs here first, against the primary
+        super().initial(request, *args, **kwargs)
+        _routing.use_replica = (
+            request.method in SAFE_METHODS
+            and self.action not in self.primary_read_actions
+            and not is_pinned_to_primary(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        _routing.use_replica = False
+        if (
+            request.method not in SAFE_METHODS
+            and self.action not in self.unpinned_write_actions
+            and response.status_code < 400
+            and getattr(request, 'user', None) is not None
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Saturated(Exception):
+    """Raised when a bounded executor has no room for more work"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard limit on queued work.
+
+    At most `max_workers` jobs run at once and at most `max_pending` more may
+    wait; anything beyond that raises `Saturated` right away so callers can
+    shed load instead of piling up behind the pool.
+    """
+
+    def __init__(self, max_workers, max_pending, thread_name_prefix=''):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = None
+
+    @property
+    def backlog(self):
+        """Number of jobs running or waiting"""
+        return self._in_flight
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                raise Saturated()
+            self._in_flight += 1
+            if self._executor is None:
+                # Created lazily so forked web workers each get their own threads
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix
+                )
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
@@ -0,0 +1,134 @@
+import hashlib
+import io
+import logging
+import os
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from createthon.executors import BoundedExecutor, Saturated
+
+logger = logging.getLogger(__name__)
+
+# Variant files carry a 12-character content hash, e.g. icon.3f2a9c01be47.md.webp
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.')
+
+image_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+    max_pending=getattr(settings, 'IMAGE_VARIANT_MAX_PENDING', 50),
+    thread_name_prefix='image-variants'
+)
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=82, method=4)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _save(name, content):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def build_variants(field_file):
+    """
+    Write resized PNG and WebP variants next to an uploaded image.
+    File names include a hash of the source bytes, so they never change
+    content and can be cached forever.
+    """
+    with field_file.open('rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    base, ext = os.path.splitext(field_file.name)
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    variants = {'original': _save(f"{base}.{digest}{ext.lower()}", data)}
+    for label, size in getattr(settings, 'IMAGE_VARIANT_SIZES', {'sm': 64, 'md': 128, 'lg': 256}).items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[label] = {
+            'webp': _save(f"{base}.{digest}.{label}.webp", _encode(resized, 'WEBP')),
+            'png': _save(f"{base}.{digest}.{label}.png", _encode(resized, 'PNG'))
+        }
+    return {'source': field_file.name, 'variants': variants}
+
+
+def variants_are_current(field_file, stored):
+    if not field_file:
+        # A cleared image must not keep serving its old variants
+        return not stored
+    return (stored or {}).get('source') == field_file.name
+
+
+def generate_variants(model_label, pk, image_field, variants_field):
+    """Build variants for one row and store their names without re-triggering save signals"""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, image_field)
+    if variants_are_current(field_file, getattr(instance, variants_field)):
+        return
+    model.objects.filter(pk=pk).update(**{variants_field: build_variants(field_file) if field_file else {}})
+
+
+def _run_in_worker(*args):
+    close_old_connections()
+    try:
+        generate_variants(*args)
+    except Exception:
+        logger.exception("Image variant generation failed for %s", args[:2])
+    finally:
+        close_old_connections()
+
+
+def enqueue_variants(instance, image_field, variants_field):
+    """
+    Generate variants off the request path once the upload commits. When the
+    pool is full the row stays stale for the generate_image_variants command.
+    """
+    field_file = getattr(instance, image_field)
+    if variants_are_current(field_file, getattr(instance, variants_field)):
+        return
+    if not field_file:
+        # Nothing to build, so drop the old variants right away
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+        setattr(instance, variants_field, {})
+        return
+    args = (instance._meta.label, instance.pk, image_field, variants_field)
+
+    def submit():
+        try:
+            image_executor.submit(_run_in_worker, *args)
+        except Saturated:
+            logger.warning("Image pool full, %s %s left for generate_image_variants", *args[:2])
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(stored):
+    """Turn stored variant names into URLs for API responses"""
+    variants = (stored or {}).get('variants')
+    if not variants:
+        return None
+    return {
+        label: (
+            {fmt: default_storage.url(name) for fmt, name in names.items()}
+            if isinstance(names, dict) else default_storage.url(names)
+        )
+        for label, names in variants.items()
+    }
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'challenges',
     'progress',
     'users',
+    'contests',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -50,24 +52,135 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'createthon.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'createthon.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_username': '5/min',
+        'register_ip': '10/hour',
+        'challenge_start_user': '30/min',
+        'challenge_start_global': '3000/min',
+        'challenge_submit_user': '10/min',
+        'challenge_submit_global': '1000/min',
+    },
 }
+
+# Responses smaller than this are sent uncompressed; brotli is used when the
+# brotli package is installed, gzip otherwise
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True
+    'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.IndexedTokenRefreshSerializer',
 }
 
+# Login issues JWTs only; set to True to also create a Django session on login
+AUTH_SESSION_LOGIN = False
+LAST_LOGIN_FLUSH_INTERVAL = 10  # seconds between batched last_login writes
+
+# Bounded pool for password hashing on login and registration
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_MAX_PENDING = 16
+PASSWORD_HASHING_RETRY_AFTER = 1  # seconds, sent as Retry-After when the pool is full
+
+# Cohorts uploaded through the staff API are hashed on this in-process pool
+# before anything is stored, then created by the process_provisioning_jobs worker
+USER_PROVISIONING_UPLOAD_WORKERS = 1
+USER_PROVISIONING_UPLOAD_MAX_PENDING = 4
+USER_PROVISIONING_UPLOAD_RETRY_AFTER = 30  # seconds, sent as Retry-After when the pool is full
+
+# Submission validation: 'thread' validates on an in-process pool, 'database'
+# leaves pending submissions for the process_submissions worker command
+SUBMISSION_ASYNC_DEFAULT = False
+SUBMISSION_QUEUE = 'thread'
+SUBMISSION_WORKERS = 4
+SUBMISSION_MAX_PENDING = 100
+SUBMISSION_RESULT_RETRY_AFTER = 1  # seconds a client should wait before polling a pending result again
+SUBMISSION_CLAIM_TIMEOUT = 60  # seconds before a submission stuck in 'processing' is reclaimed
+# Thread mode re-queues submissions pending longer than this (shed by a full pool
+# or lost in a restart), checking at most once per interval per process
+SUBMISSION_SWEEP_INTERVAL = 30
+# New submissions get a 503 once this many are queued or validating, counting
+# synchronous validations too. In thread mode it is capped at the pool's
+# capacity (SUBMISSION_WORKERS + SUBMISSION_MAX_PENDING), which it must stay
+# below for the 503 to come before the pool starts refusing work.
+SUBMISSION_BACKLOG_LIMIT = 80
+SUBMISSION_BACKLOG_RETRY_AFTER = 5  # seconds
+
+# Editor heartbeats are buffered per process and added to time_spent on this interval
+HEARTBEAT_FLUSH_INTERVAL = 5  # seconds
+HEARTBEAT_MAX_SECONDS = 60  # cap on the seconds one heartbeat may report
+
+# Seconds a facet count result is cached per filter combination
+CHALLENGE_FACETS_CACHE_TIMEOUT = 300
+
+# Similar challenges kept per challenge by compute_challenge_similarity
+RECOMMENDATION_NEIGHBOURS = 20
+
+# Leaderboard score histogram: bucket width in points, and the board size up
+# to which percentiles are counted exactly instead of interpolated
+SCORE_HISTOGRAM_BUCKET_WIDTH = 50
+SCORE_HISTOGRAM_EXACT_MAX_USERS = 1000
+
+# Near-duplicate submission detection: MinHash signature length, LSH bands and
+# the estimated similarity reported as a near-duplicate. Pairs above about
+# (1/bands)**(bands/permutations) similarity (0.42 here) become candidates, well
+# below the threshold so few near-duplicates are missed; candidates are then
+# checked against their signatures. Changing the first three needs
+# rebuild_submission_signatures.
+PLAGIARISM_MINHASH_PERMUTATIONS = 128
+PLAGIARISM_LSH_BANDS = 32
+PLAGIARISM_SHINGLE_SIZE = 5  # tokens per shingle
+PLAGIARISM_SIMILARITY_THRESHOLD = 0.7
+PLAGIARISM_WORKERS = 2
+PLAGIARISM_MAX_PENDING = 200
+
+# Seconds a process may serve its in-memory global ranking (used for group
+# leaderboards) after scores change before rebuilding it
+LEADERBOARD_RANKING_REFRESH_INTERVAL = 5
+# Seconds a group's member ids stay cached; membership changes also clear them
+STUDY_GROUP_MEMBERS_CACHE_TIMEOUT = 300
+
+# Contest scoreboards: live boards are cached this many seconds; frozen boards
+# are served from their snapshot, cached for at most the frozen timeout or until the unfreeze
+CONTEST_SCOREBOARD_CACHE_TIMEOUT = 5
+CONTEST_FROZEN_SCOREBOARD_CACHE_TIMEOUT = 60  # the snapshot never changes; bounds a missed unfreeze delete
+CONTEST_WRONG_ATTEMPT_PENALTY = 1200  # seconds added per failed attempt before a solve
+
+# Idempotency-Key support on start_challenge and submit_challenge
+IDEMPOTENCY_KEY_TTL = 86400  # seconds a stored response is replayed
+IDEMPOTENCY_LOCK_WAIT = 10  # seconds a concurrent duplicate waits for the first request
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds before an unfinished request's placeholder is taken over
+
+# In-process refresh token blacklist index (see users/blacklist.py)
+TOKEN_BLACKLIST_INDEX_CAPACITY = 100000
+TOKEN_BLACKLIST_INDEX_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_INDEX_SYNC_INTERVAL = 1  # seconds between incremental syncs
+TOKEN_BLACKLIST_INDEX_SYNC_OVERLAP = 200  # recent ids re-read on each sync
+TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL = 3600  # seconds between full rebuilds
+
 # db name=createathon_db
 # user=createathon_user
 # password=createathon
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'createthon.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -112,6 +225,57 @@ DATABASES = {
     }
 }
 
+# 'default' is shared by every worker process: version stamps that tell
+# processes to rebuild in-memory indexes, read-your-writes pins and cached
+# boards rely on it. 'throttle' holds rate limit counters, which need atomic
+# increments. Set REDIS_URL (e.g. redis://localhost:6379/0, needs the redis
+# package) to put both on Redis, which is what production should use.
+#
+# Without it, 'default' is a database table (`manage.py createcachetable`)
+# with MAX_ENTRIES far above the live key count: the database cache culls by
+# key order once full, which would drop stamps and pins. Throttle counters
+# then stay in each process's memory, so limits apply per process. A
+# per-process 'default' (LocMemCache) only works with a single process;
+# in-memory copies then rebuild every VERSION_STAMP_MAX_AGE seconds instead
+# of on changes.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'throttle',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle',
+            # Least recently used keys go first, so a spray of new keys cannot evict an active bucket
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+THROTTLE_CACHE = 'throttle'
+VERSION_STAMP_MAX_AGE = 60
+
+# Read replicas: add each one to DATABASES (e.g. 'replica1' with the same
+# ENGINE/NAME on another HOST) and list its alias here. Safe-method API reads
+# go to a healthy replica; writes and everything outside the API use 'default'.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['createthon.db_router.ReplicaRouter']
+DATABASE_READ_STICKY_SECONDS = 10  # a user's reads stay on the primary this long after a write
+DATABASE_REPLICA_CHECK_INTERVAL = 10  # seconds between health checks of each replica
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -149,6 +313,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded category icons, achievement badges and their generated variants
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Square bounding boxes (px) for generated image variants
+IMAGE_VARIANT_SIZES = {'sm': 64, 'md': 128, 'lg': 256}
+IMAGE_VARIANT_WORKERS = 2
+IMAGE_VARIANT_MAX_PENDING = 50
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -180,4 +353,5 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
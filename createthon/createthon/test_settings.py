@@ -0,0 +1,26 @@
+# Settings for the test suite: python manage.py test --settings=createthon.test_settings
+# Runs on SQLite files instead of the Postgres server, so threaded tests can
+# share the database and no server is needed.
+from createthon.settings import *  # noqa: F401,F403
+from createthon.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-default.sqlite3',
+        # Writers queue on the database lock instead of failing under parallel tests
+        'OPTIONS': {'timeout': 30, 'transaction_mode': 'IMMEDIATE'},
+        'TEST': {'NAME': BASE_DIR / 'test-default.sqlite3'}
+    },
+    # A separate file rather than a mirror, so tests can tell which database
+    # served a read; only used by tests that enable it in DATABASE_REPLICAS
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test-replica.sqlite3',
+        'OPTIONS': {'timeout': 30},
+        'TEST': {'NAME': BASE_DIR / 'test-replica.sqlite3'}
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+MEDIA_ROOT = BASE_DIR / 'test-media'
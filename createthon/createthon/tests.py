@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from challenges.models import Category, Challenge
+from challenges.throttling import GlobalBucket
+from createthon.db_router import replica_pool
+from createthon.throttling import SlidingWindowThrottle
+from progress.heartbeats import heartbeat_buffer
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Safe requests read from the replica until the user writes. The replica is
+    a separate SQLite file holding different rows, so each response shows
+    which database served it.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        replica_pool.reset()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'x')
+        self.challenge = Challenge.objects.create(
+            title='On primary', description='Written to the primary', difficulty='beginner', points=10,
+            category=Category.objects.create(name='Python'), status='published', solution='print(1)'
+        )
+        Challenge.objects.using('replica').create(
+            title='On replica', description='Lagging copy', difficulty='beginner', points=10,
+            category=Category.objects.using('replica').create(name='Python'), status='published',
+            solution='print(1)'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self):
+        response = self.client.get('/challenges/challenges/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [challenge['title'] for challenge in results]
+
+    def test_reads_use_the_replica(self):
+        self.assertEqual(self.titles(), ['On replica'])
+
+    def test_write_pins_reads_to_the_primary(self):
+        response = self.client.post(f'/challenges/challenges/{self.challenge.pk}/start_challenge/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(), ['On primary'])
+
+    def test_heartbeat_does_not_pin(self):
+        response = self.client.post(
+            f'/challenges/challenges/{self.challenge.pk}/heartbeat/', {'seconds': 5}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.titles(), ['On replica'])
+        # Write it now rather than from the exit hook, after the test database is gone
+        heartbeat_buffer.flush()
+
+
+class FiveAMinute(GlobalBucket, SlidingWindowThrottle):
+    scope = 'test_five_a_minute'
+    rate = '5/min'
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'}
+    },
+    THROTTLE_CACHE='throttle'
+)
+class SlidingWindowThrottleTests(SimpleTestCase):
+    """A shared bucket admits exactly its rate, however many requests arrive at once"""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.request = APIRequestFactory().post('/')
+
+    def allow(self, now=None):
+        throttle = FiveAMinute()
+        if now is not None:
+            throttle.timer = lambda: now
+        return throttle.allow_request(self.request, None), throttle.wait()
+
+    def test_parallel_requests_cannot_overrun_the_limit(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            allowed = [ok for ok, _ in pool.map(lambda _: self.allow(), range(40))]
+
+        self.assertEqual(allowed.count(True), 5)
+
+    def test_previous_window_is_weighed_across_the_edge(self):
+        for _ in range(5):
+            self.assertTrue(self.allow(now=6030)[0])
+        allowed, wait = self.allow(now=6059)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1)
+
+        # A quarter into the next window, three quarters of the old count still apply
+        self.assertTrue(self.allow(now=6075)[0])
+        self.assertFalse(self.allow(now=6075)[0])
+        # Once a window has passed with no traffic the whole rate is available again
+        self.assertEqual([self.allow(now=6180)[0] for _ in range(6)], [True] * 5 + [False])
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window variant of DRF's rate throttles.
+
+    Requests are counted per fixed window of the configured rate (e.g.
+    "10/min") and the limit is checked against the current window plus the
+    previous one weighted by how much of it still overlaps the last `duration`
+    seconds, so a burst straddling a window edge cannot double the rate.
+
+    Counters only ever change through cache.add and cache.incr, so concurrent
+    requests cannot all read the same count and pass; this relies on a
+    backend with atomic incr (Redis, Memcached, LocMemCache). State lives in
+    the THROTTLE_CACHE cache alias.
+    """
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        elapsed /= self.duration
+        current_key = f'{self.key}:{int(window)}'
+
+        # Kept two windows so it can be weighed as the previous one
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            count = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add and incr; start the window again
+            self.cache.add(current_key, 1, self.duration * 2)
+            count = 1
+        previous = self.cache.get(f'{self.key}:{int(window) - 1}', 0)
+
+        if previous * (1 - elapsed) + count <= self.num_requests:
+            return True
+
+        # Rejected requests do not use up the allowance
+        self.cache.decr(current_key)
+        room = self.num_requests - count
+        needed = 1 - room / previous if previous and room >= 0 else 1
+        self._wait = max(0, needed - elapsed) * self.duration
+        return False
+
+    def wait(self):
+        return getattr(self, '_wait', None)
@@ -14,13 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path,include
+from django.urls import path,include,re_path
+
+from createthon.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('',include('users.urls')),
     path('challenges/',include('challenges.urls')),
-    path('progress/',include('progress.urls'))
+    path('progress/',include('progress.urls')),
+    path('contests/',include('contests.urls'))
 
 ]
+
+if settings.DEBUG:
+    # In production the web server serves MEDIA_ROOT with the same cache rules
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media),
+    ]
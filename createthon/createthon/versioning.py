@@ -0,0 +1,47 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache'
+)
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+class VersionStamp:
+    """
+    Token in the shared cache telling every process when its in-process copy
+    of some data is stale: writers bump it, readers rebuild when it differs
+    from the one their copy was built at.
+
+    With a per-process cache other processes never see a bump, so the token
+    then also rolls over every VERSION_STAMP_MAX_AGE seconds and copies are
+    rebuilt at least that often.
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def current(self):
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, uuid.uuid4().hex, None)
+            version = cache.get(self.key)
+        if not cache_is_shared():
+            version = (version, int(time.time() // getattr(settings, 'VERSION_STAMP_MAX_AGE', 60)))
+        return version
+
+    def bump(self):
+        cache.set(self.key, uuid.uuid4().hex, None)
+
+    def bump_on_commit(self):
+        """Bump once the current transaction commits, so readers rebuild from committed data"""
+        transaction.on_commit(self.bump)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.views.static import serve
+
+from createthon.images import HASHED_NAME_RE
+
+
+def serve_media(request, path):
+    """
+    Development media server. Content-hashed files are immutable and get a
+    year-long cache lifetime; anything else must be revalidated.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if HASHED_NAME_RE.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from progress.models import UserAchievement,UserProgress,Achievement,Leaderboard
+from progress.models import UserAchievement,UserProgress,Achievement,Leaderboard,Submission,CodeBlob
 
 admin.site.register(UserProgress)
 admin.site.register(UserAchievement)
 admin.site.register(Achievement)
 admin.site.register(Leaderboard)
+admin.site.register(Submission)
+admin.site.register(CodeBlob)
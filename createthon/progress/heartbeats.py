@@ -0,0 +1,40 @@
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from createthon.buffering import BufferedWriter
+from progress.models import UserProgress
+
+
+class HeartbeatBuffer(BufferedWriter):
+    """
+    Sums editor heartbeat seconds per (user_id, challenge_id) and adds them to
+    UserProgress.time_spent in grouped UPDATEs on each flush
+    """
+    rows_per_update = 200
+
+    def combine(self, current, value):
+        return current + value
+
+    def write(self, pending):
+        # Heartbeats arrive on a fixed interval, so most pairs share a handful of totals
+        by_seconds = defaultdict(list)
+        for (user_id, challenge_id), seconds in pending.items():
+            by_seconds[seconds].append(Q(user_id=user_id, challenge_id=challenge_id))
+
+        with transaction.atomic():
+            for seconds, conditions in by_seconds.items():
+                for i in range(0, len(conditions), self.rows_per_update):
+                    # Time after completion would skew the per-challenge leaderboard
+                    UserProgress.objects.filter(
+                        reduce(operator.or_, conditions[i:i + self.rows_per_update])
+                    ).exclude(
+                        status='completed'
+                    ).update(time_spent=F('time_spent') + seconds)
+
+
+heartbeat_buffer = HeartbeatBuffer(getattr(settings, 'HEARTBEAT_FLUSH_INTERVAL', 5))
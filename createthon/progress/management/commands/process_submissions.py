@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.core.management.base import BaseCommand
+
+from progress.models import Submission
+from progress.submissions import process_submission, reclaim_stale_claims
+
+
+class Command(BaseCommand):
+    help = (
+        "Validates pending submissions, first reclaiming ones whose worker stopped mid-validation; "
+        "runs as a long-lived queue worker unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Submissions validated in parallel")
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Pending submissions claimed per poll")
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the current queue and exit")
+
+    def handle(self, *args, **options):
+        processed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                reclaim_stale_claims()
+                ids = self._next_batch(options['batch_size'])
+                if ids:
+                    list(pool.map(self._process, ids))
+                    processed += len(ids)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} submissions"))
+
+    def _next_batch(self, batch_size):
+        """Oldest pending ids, skipping rows another worker has locked"""
+        with transaction.atomic():
+            return list(
+                Submission.objects.select_for_update(skip_locked=True).filter(
+                    status='pending'
+                ).order_by('submitted_at').values_list('id', flat=True)[:batch_size]
+            )
+
+    def _process(self, submission_id):
+        close_old_connections()
+        try:
+            process_submission(submission_id)
+        finally:
+            close_old_connections()
@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from progress.models import DailyActivity, Submission, UserProgress, UserStreak
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the per-day activity table and every user's streak from progress "
+        "start/completion times and the submission log (for backfilling or repairing them)"
+    )
+
+    def handle(self, *args, **options):
+        sources = [
+            ('started', UserProgress.objects.filter(start_time__isnull=False), 'start_time'),
+            ('submitted', Submission.objects.all(), 'submitted_at'),
+            ('completed', UserProgress.objects.filter(status='completed', completed_at__isnull=False), 'completed_at')
+        ]
+        counts = defaultdict(dict)
+        for kind, queryset, field in sources:
+            rows = queryset.annotate(
+                day=TruncDate(field)
+            ).values('user_id', 'day').annotate(n=Count('id')).order_by()
+            for row in rows.iterator(chunk_size=5000):
+                counts[row['user_id'], row['day']][kind] = row['n']
+
+        activity = [
+            DailyActivity(user_id=user_id, day=day, **kinds)
+            for (user_id, day), kinds in sorted(counts.items())
+        ]
+
+        days_by_user = defaultdict(list)
+        for row in activity:
+            days_by_user[row.user_id].append(row.day)
+        streaks = [UserStreak.from_days(user_id, days) for user_id, days in days_by_user.items()]
+
+        # Swapped in one transaction, so readers see the old or the new table, never neither
+        with transaction.atomic():
+            DailyActivity.objects.all().delete()
+            UserStreak.objects.all().delete()
+            DailyActivity.objects.bulk_create(activity, batch_size=1000)
+            UserStreak.objects.bulk_create(streaks, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(activity)} activity days and {len(streaks)} streaks"
+        ))
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from progress.models import LeaderboardBucket, UserProgress
+
+TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the daily/weekly/monthly leaderboard buckets from completed progress "
+        "(for backfilling or repairing them) and optionally prunes old daily buckets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', choices=list(TRUNCATE), action='append',
+                            help="Period to rebuild; repeatable (defaults to all of them)")
+        parser.add_argument('--keep-days', type=int, default=None,
+                            help="Delete daily buckets older than this many days")
+
+    def handle(self, *args, **options):
+        for period in options['period'] or list(TRUNCATE):
+            totals = UserProgress.objects.filter(
+                status='completed',
+                completed_at__isnull=False
+            ).annotate(
+                bucket=TRUNCATE[period]('completed_at')
+            ).values('bucket', 'user_id').annotate(
+                total_points=Sum('challenge__points'),
+                challenges_completed=Count('id')
+            ).order_by()
+
+            buckets = [
+                LeaderboardBucket(
+                    period=period,
+                    bucket_start=timezone.localdate(row['bucket']),
+                    user_id=row['user_id'],
+                    total_points=row['total_points'] or 0,
+                    challenges_completed=row['challenges_completed']
+                )
+                for row in totals
+            ]
+            # Swapped in one transaction, so readers see the old or the new buckets, never neither
+            with transaction.atomic():
+                LeaderboardBucket.objects.filter(period=period).delete()
+                LeaderboardBucket.objects.bulk_create(buckets, batch_size=1000)
+            self.stdout.write(f"{period}: {len(buckets)} buckets")
+
+        if options['keep_days'] is not None:
+            cutoff = timezone.localdate() - timedelta(days=options['keep_days'])
+            deleted, _ = LeaderboardBucket.objects.filter(period='day', bucket_start__lt=cutoff).delete()
+            self.stdout.write(f"Pruned {deleted} daily buckets before {cutoff}")
+
+        self.stdout.write(self.style.SUCCESS("Leaderboard buckets rebuilt"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress.models import Leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Renumbers every leaderboard ranking from points (solves only re-rank the "
+        "entries they move past, so this repairs ranks after direct edits)"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Leaderboard.update_rankings()
+
+        self.stdout.write(self.style.SUCCESS(f"Ranked {Leaderboard.objects.count()} leaderboard entries"))
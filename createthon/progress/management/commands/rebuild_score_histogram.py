@@ -0,0 +1,29 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from progress.models import Leaderboard, ScoreHistogramBucket
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the leaderboard score histogram from Leaderboard totals "
+        "(after changing SCORE_HISTOGRAM_BUCKET_WIDTH or to repair drift)"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the board so no score moves between the count and the swap
+            counts = Counter(
+                ScoreHistogramBucket.lower_bound(points)
+                for points in Leaderboard.objects.select_for_update().values_list('total_points', flat=True)
+            )
+            ScoreHistogramBucket.objects.all().delete()
+            ScoreHistogramBucket.objects.bulk_create(
+                [ScoreHistogramBucket(lower=lower, count=count) for lower, count in counts.items()]
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(counts)} buckets covering {sum(counts.values())} leaderboard entries"
+        ))
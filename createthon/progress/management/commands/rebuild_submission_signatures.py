@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+
+from progress import minhash
+from progress.models import CodeBlob, Submission, SubmissionSignature
+from progress.plagiarism import signature_options, store_signatures
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes MinHash signatures and LSH band keys for submissions across a "
+        "process pool (for backfills, settings changes or submissions the live pool skipped)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--challenge', type=int, action='append',
+                            help="Only submissions to this challenge; repeatable")
+        parser.add_argument('--missing', action='store_true',
+                            help="Only submissions without a signature")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Signing processes (defaults to the CPU count)")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Submissions signed and stored per batch")
+
+    def handle(self, *args, **options):
+        submissions = Submission.objects.order_by('id')
+        if options['challenge']:
+            submissions = submissions.filter(challenge_id__in=options['challenge'])
+        if options['missing']:
+            submissions = submissions.filter(signature__isnull=True)
+        rows = list(submissions.values_list('id', 'challenge_id', 'user_id', 'blob_id'))
+
+        workers = options['workers'] or os.cpu_count() or 1
+        sign = partial(minhash.signature, **signature_options())
+        batch_size = options['batch_size']
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                # Identical code is stored once, so each distinct blob is signed once
+                blob_ids = sorted({blob_id for *_, blob_id in batch})
+                blobs = CodeBlob.objects.in_bulk(blob_ids)
+                codes = [blobs[blob_id].text for blob_id in blob_ids]
+                chunksize = max(1, len(codes) // (workers * 4))
+                signatures = dict(zip(blob_ids, pool.map(sign, codes, chunksize=chunksize)))
+
+                store_signatures([
+                    (submission_id, challenge_id, user_id, signatures[blob_id])
+                    for submission_id, challenge_id, user_id, blob_id in batch
+                ])
+                self.stdout.write(f"Signed {start + len(batch)}/{len(rows)} submissions")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt signatures for {len(rows)} submissions; "
+            f"{SubmissionSignature.objects.count()} indexed in total"
+        ))
@@ -0,0 +1,105 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:25
+
+import hashlib
+import zlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_submission_code(apps, schema_editor):
+    """Copy each inline submission_code into the submission log"""
+    UserProgress = apps.get_model('progress', 'UserProgress')
+    CodeBlob = apps.get_model('progress', 'CodeBlob')
+    Submission = apps.get_model('progress', 'Submission')
+    db_alias = schema_editor.connection.alias
+
+    progress_rows = UserProgress.objects.using(db_alias).exclude(submission_code='').only(
+        'id', 'user_id', 'challenge_id', 'status', 'time_spent', 'last_attempt_time', 'submission_code'
+    )
+    for progress in progress_rows.iterator(chunk_size=500):
+        raw = progress.submission_code.encode('utf-8')
+        blob, _ = CodeBlob.objects.using(db_alias).get_or_create(
+            sha256=hashlib.sha256(raw).hexdigest(),
+            defaults={'compressed_code': zlib.compress(raw), 'size': len(raw)}
+        )
+        submission = Submission.objects.using(db_alias).create(
+            user_id=progress.user_id,
+            challenge_id=progress.challenge_id,
+            blob=blob,
+            passed={'completed': True, 'failed': False}.get(progress.status),
+            time_spent=progress.time_spent,
+            submitted_at=progress.last_attempt_time
+        )
+        UserProgress.objects.using(db_alias).filter(pk=progress.pk).update(latest_submission=submission)
+
+
+def restore_submission_code(apps, schema_editor):
+    """Copy the latest logged submission back inline"""
+    UserProgress = apps.get_model('progress', 'UserProgress')
+    db_alias = schema_editor.connection.alias
+
+    progress_rows = UserProgress.objects.using(db_alias).filter(
+        latest_submission__isnull=False
+    ).select_related('latest_submission__blob')
+    for progress in progress_rows.iterator(chunk_size=500):
+        code = zlib.decompress(bytes(progress.latest_submission.blob.compressed_code)).decode('utf-8')
+        UserProgress.objects.using(db_alias).filter(pk=progress.pk).update(submission_code=code)
+
+
+class Migration(migrations.Migration):
+    # Not one transaction: on PostgreSQL the data step queues deferred foreign key
+    # checks on progress_userprogress, and altering that table before they run at
+    # commit fails with "pending trigger events". The copy commits on its own
+    # before submission_code is dropped.
+    atomic = False
+
+    dependencies = [
+        ('challenges', '0002_challengetag_category_icon_challenge_code_template_and_more'),
+        ('progress', '0002_userprogress_last_attempt_time_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('compressed_code', models.BinaryField()),
+                ('size', models.IntegerField(help_text='Uncompressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('passed', models.BooleanField(null=True)),
+                ('time_spent', models.IntegerField(default=0, help_text='Time spent in seconds')),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='progress.codeblob')),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='challenges.challenge')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-submitted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='latest_submission',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='progress.submission'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['user', 'challenge', '-submitted_at'], name='progress_su_user_id_612140_idx'),
+        ),
+        migrations.RunPython(move_submission_code, restore_submission_code, atomic=True),
+        migrations.RemoveField(
+            model_name='userprogress',
+            name='submission_code',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0002_challengetag_category_icon_challenge_code_template_and_more'),
+        ('progress', '0003_submission_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='details',
+            field=models.TextField(blank=True),
+        ),
+        # Existing submissions were validated synchronously, so they start out as done
+        migrations.AddField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('error', 'Error')], default='done', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('error', 'Error')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['status', 'submitted_at'], name='progress_su_status_69cba0_idx'),
+        ),
+    ]
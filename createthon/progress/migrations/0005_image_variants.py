@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_submission_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='badge_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-19 06:41
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_histogram(apps, schema_editor):
+    """Seed the histogram from the current leaderboard"""
+    Leaderboard = apps.get_model('progress', 'Leaderboard')
+    ScoreHistogramBucket = apps.get_model('progress', 'ScoreHistogramBucket')
+    db_alias = schema_editor.connection.alias
+
+    width = getattr(settings, 'SCORE_HISTOGRAM_BUCKET_WIDTH', 50)
+    counts = Counter(
+        points // width * width
+        for points in Leaderboard.objects.using(db_alias).values_list('total_points', flat=True)
+    )
+    ScoreHistogramBucket.objects.using(db_alias).bulk_create(
+        [ScoreHistogramBucket(lower=lower, count=count) for lower, count in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0006_leaderboard_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogramBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lower', models.IntegerField(unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['lower'],
+            },
+        ),
+        migrations.RunPython(populate_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0009_submission_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a worker took it for validation', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0010_submission_claimed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['-total_points', '-challenges_completed'], name='progress_le_total_p_0c2965_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+import builtins
+import hashlib
+import keyword
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# MinHash signatures and LSH band keys for source code. Kept free of Django
+# imports so batch jobs can fan signature work out to worker processes.
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Python and C-style comments, which copied code often has rewritten
+COMMENT_RE = re.compile(r'#[^\n]*|//[^\n]*|/\*.*?\*/', re.S)
+TOKEN_RE = re.compile(r'[A-Za-z_]\w*|\d+|\S')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_]')
+# Names kept as-is; every other identifier becomes one placeholder so renaming
+# variables does not hide a copy
+RESERVED_NAMES = frozenset(keyword.kwlist) | frozenset(dir(builtins))
+
+
+def tokens(code):
+    """Code as a token list, ignoring comments, whitespace, layout and identifier names"""
+    return [
+        'ID' if IDENTIFIER_RE.match(token) and token not in RESERVED_NAMES else token
+        for token in TOKEN_RE.findall(COMMENT_RE.sub(' ', code or ''))
+    ]
+
+
+def shingles(code, size):
+    """Distinct 32-bit hashes of every run of `size` consecutive tokens"""
+    words = tokens(code)
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    windows = (' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1)))
+    return np.unique(np.fromiter(
+        (int.from_bytes(hashlib.blake2b(w.encode(), digest_size=4).digest(), 'little') for w in windows),
+        dtype=np.uint64
+    ))
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def signature(code, num_perm=128, shingle_size=5, seed=1):
+    """
+    MinHash signature (num_perm uint32 values) of the code's shingles. Two
+    signatures agree at a position with probability equal to the Jaccard
+    similarity of the shingle sets.
+    """
+    hashes = shingles(code, shingle_size)
+    if not len(hashes):
+        return np.full(num_perm, MAX_HASH, dtype=np.uint32)
+    a, b = _permutations(num_perm, seed)
+    # Universal hashing a*x + b mod p; the product wraps in uint64, which is fine for hashing
+    with np.errstate(over='ignore'):
+        permuted = (a * hashes + b) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(minhash, bands):
+    """
+    One 64-bit key per LSH band. Signatures sharing any key are candidates;
+    with r = num_perm / bands rows per band, pairs above roughly
+    (1 / bands) ** (1 / r) similarity almost always collide.
+    """
+    rows = len(minhash) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(band.to_bytes(2, 'little') + minhash[band * rows:(band + 1) * rows].tobytes(),
+                            digest_size=8).digest(),
+            'little',
+            signed=True
+        )
+        for band in range(bands)
+    ]
+
+
+def similarity(minhash, others):
+    """Estimated Jaccard similarity of one signature to each row of a signature matrix"""
+    return (np.asarray(others) == minhash).mean(axis=-1)
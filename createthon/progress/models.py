@@ -1,4 +1,9 @@
-from django.db import models
+import hashlib
+import zlib
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.conf import settings
 from django.contrib.auth.models import User
 from challenges.models import Challenge
 from django.utils import timezone
@@ -16,7 +21,9 @@ class UserProgress(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='started')
     attempts = models.IntegerField(default=0)
     completed_at = models.DateTimeField(null=True, blank=True)
-    submission_code = models.TextField(blank=True)
+    latest_submission = models.ForeignKey(
+        'Submission', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
     start_time = models.DateTimeField(auto_now_add=True,null=True)
     last_attempt_time = models.DateTimeField(auto_now=True)
     time_spent = models.IntegerField(default=0, help_text="Time spent in seconds")
@@ -26,14 +33,23 @@ class UserProgress(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s progress on {self.challenge.title}"
+
+    @property
+    def submission_code(self):
+        """Code of the latest submission, read from the submission log"""
+        if self.latest_submission is None:
+            return ''
+        return self.latest_submission.blob.text
     
     def mark_completed(self):
         """Mark the challenge as completed and record completion time"""
         self.status = 'completed'
         self.completed_at = timezone.now()
-        self.save()
-        
-        # Check for newly earned achievements
+        self.save(update_fields=['status', 'completed_at', 'last_attempt_time'])
+        self.award_achievements()
+
+    def award_achievements(self):
+        """Award any achievements the user's completed points now qualify for"""
         total_points = UserProgress.objects.filter(
             user=self.user, 
             status='completed'
@@ -49,17 +65,74 @@ class UserProgress(models.Model):
         )
         
         # Award new achievements
-        for achievement in achievements:
-            UserAchievement.objects.create(
-                user=self.user,
-                achievement=achievement
-            )
+        UserAchievement.objects.bulk_create(
+            [UserAchievement(user=self.user, achievement=achievement) for achievement in achievements],
+            ignore_conflicts=True
+        )
+
+class CodeBlob(models.Model):
+    """Submitted source code, stored compressed and once per unique content"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    compressed_code = models.BinaryField()
+    size = models.IntegerField(help_text="Uncompressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.compressed_code)).decode('utf-8')
+
+    @classmethod
+    def store(cls, code):
+        """Return the blob for this code, creating it only if the content is new"""
+        raw = code.encode('utf-8')
+        blob, _ = cls.objects.get_or_create(
+            sha256=hashlib.sha256(raw).hexdigest(),
+            defaults={'compressed_code': zlib.compress(raw), 'size': len(raw)}
+        )
+        return blob
+
+class Submission(models.Model):
+    """Append-only log of every submitted attempt"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('error', 'Error')
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    blob = models.ForeignKey(CodeBlob, on_delete=models.PROTECT)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    passed = models.BooleanField(null=True)
+    details = models.TextField(blank=True)
+    time_spent = models.IntegerField(default=0, help_text="Time spent in seconds")
+    submitted_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a worker took it for validation")
+
+    class Meta:
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['user', 'challenge', '-submitted_at']),
+            models.Index(fields=['status', 'submitted_at'])
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s submission for {self.challenge.title}"
+
+    @property
+    def code(self):
+        return self.blob.text
 
 class Achievement(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     points_required = models.IntegerField()
     badge_icon = models.ImageField(upload_to='uploads/achievements/', null=True, blank=True)
+    badge_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return self.name
@@ -84,6 +157,346 @@ class Leaderboard(models.Model):
     
     class Meta:
         ordering = ['-total_points', 'ranking']
+        indexes = [
+            models.Index(fields=['-total_points', '-challenges_completed'])
+        ]
     
     def __str__(self):
-        return f"{self.user.username}'s leaderboard entry"
\ No newline at end of file
+        return f"{self.user.username}'s leaderboard entry"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Points as loaded, so any later save (admin edits included) can move the
+        # entry between score histogram buckets
+        instance._histogram_points = dict(zip(field_names, values)).get('total_points')
+        return instance
+
+    @classmethod
+    def refresh_for_user(cls, user):
+        """Recalculate a user's leaderboard entry and re-rank the entries it moved past"""
+        totals = UserProgress.objects.filter(
+            user=user,
+            status='completed'
+        ).aggregate(
+            total_points=models.Sum('challenge__points'),
+            challenges_completed=models.Count('id')
+        )
+        
+        # Update or create leaderboard entry; the row lock keeps the histogram move in step
+        with transaction.atomic():
+            cls.objects.get_or_create(user=user)
+            leaderboard = cls.objects.select_for_update().get(user=user)
+            previous = leaderboard.rank_key()
+            leaderboard.total_points = totals['total_points'] or 0
+            leaderboard.challenges_completed = totals['challenges_completed']
+            leaderboard.save()
+        
+            # Only entries between the old and new place shift; the rest keep their ranks
+            cls.rerank_between(*sorted([previous, leaderboard.rank_key()]))
+
+    # Rank order, ties going to the older account (as in the global ranking)
+    RANK_ORDER = ('-total_points', '-challenges_completed', 'user_id')
+
+    def rank_key(self):
+        """Sort key of the entry in RANK_ORDER"""
+        return (-self.total_points, -self.challenges_completed, self.user_id)
+
+    @staticmethod
+    def _ranked_before(key, inclusive=False):
+        """Filter for entries ranked ahead of a rank key (or at it, if inclusive)"""
+        points, completed, user_id = -key[0], -key[1], key[2]
+        return (
+            models.Q(total_points__gt=points)
+            | models.Q(total_points=points, challenges_completed__gt=completed)
+            | models.Q(total_points=points, challenges_completed=completed, **{
+                'user_id__lte' if inclusive else 'user_id__lt': user_id
+            })
+        )
+
+    @classmethod
+    def rerank_between(cls, first, last):
+        """Renumber the entries from rank key `first` to `last`, locking them while they are written"""
+        ahead = cls.objects.filter(cls._ranked_before(first)).count()
+        entries = cls.objects.select_for_update().filter(
+            cls._ranked_before(last, inclusive=True)
+        ).exclude(
+            cls._ranked_before(first)
+        ).order_by(*cls.RANK_ORDER).only('id', 'ranking')
+
+        now = timezone.now()
+        changed = []
+        for ranking, entry in enumerate(entries, start=ahead + 1):
+            if entry.ranking != ranking:
+                entry.ranking, entry.last_updated = ranking, now
+                changed.append(entry)
+        # Only the ranking, so a concurrent points refresh is not overwritten
+        cls.objects.bulk_update(changed, ['ranking', 'last_updated'])
+
+    @classmethod
+    def update_rankings(cls):
+        """Renumber the whole board; repairs ranks left behind by direct edits"""
+        leaderboards = cls.objects.all().order_by(*cls.RANK_ORDER)
+        
+        for i, leaderboard in enumerate(leaderboards):
+            if leaderboard.ranking != i + 1:  # Only update if ranking changed
+                leaderboard.ranking = i + 1
+                # Only the ranking, so a concurrent points refresh is not overwritten
+                leaderboard.save(update_fields=['ranking', 'last_updated'])
+
+
+class LeaderboardBucket(models.Model):
+    """
+    Points earned by a user within one calendar day, week or month. Buckets
+    are incremented as challenges are completed, so a windowed board reads one
+    bucket per user instead of scanning progress.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Daily'),
+        ('week', 'Weekly'),
+        ('month', 'Monthly')
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket_start = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    total_points = models.IntegerField(default=0)
+    challenges_completed = models.IntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('period', 'bucket_start', 'user')
+        indexes = [
+            models.Index(fields=['period', 'bucket_start', '-total_points', '-challenges_completed'])
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s {self.period} leaderboard entry from {self.bucket_start}"
+
+    @staticmethod
+    def start_of(period, day):
+        """First day of the bucket containing the given date"""
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        if period == 'month':
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def current_start(cls, period):
+        return cls.start_of(period, timezone.localdate())
+
+    @classmethod
+    def record_completion(cls, user_progress):
+        """Add a first completion to the buckets of every period it falls in"""
+        day = timezone.localdate(user_progress.completed_at)
+        points = user_progress.challenge.points
+        for period, _ in cls.PERIOD_CHOICES:
+            lookup = {'period': period, 'bucket_start': cls.start_of(period, day), 'user': user_progress.user}
+            increments = {
+                'total_points': models.F('total_points') + points,
+                'challenges_completed': models.F('challenges_completed') + 1
+            }
+            if not cls.objects.filter(**lookup).update(**increments):
+                _, created = cls.objects.get_or_create(
+                    **lookup, defaults={'total_points': points, 'challenges_completed': 1}
+                )
+                if not created:
+                    cls.objects.filter(**lookup).update(**increments)
+
+
+class ScoreHistogramBucket(models.Model):
+    """
+    Number of leaderboard entries whose total points fall in
+    [lower, lower + SCORE_HISTOGRAM_BUCKET_WIDTH). Kept in step with
+    Leaderboard so the distribution and percentiles never scan the board.
+    """
+    lower = models.IntegerField(unique=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['lower']
+
+    def __str__(self):
+        return f"{self.count} users from {self.lower} points"
+
+    @staticmethod
+    def width():
+        return getattr(settings, 'SCORE_HISTOGRAM_BUCKET_WIDTH', 50)
+
+    @classmethod
+    def lower_bound(cls, points):
+        return points // cls.width() * cls.width()
+
+    @classmethod
+    def add(cls, points, delta):
+        lower = cls.lower_bound(points)
+        if not cls.objects.filter(lower=lower).update(count=models.F('count') + delta):
+            _, created = cls.objects.get_or_create(lower=lower, defaults={'count': delta})
+            if not created:
+                cls.objects.filter(lower=lower).update(count=models.F('count') + delta)
+
+    @classmethod
+    def move(cls, previous_points, points):
+        """Move one entry between buckets; previous_points is None for a new entry"""
+        if previous_points is not None and cls.lower_bound(previous_points) == cls.lower_bound(points):
+            return
+        if previous_points is not None:
+            cls.add(previous_points, -1)
+        cls.add(points, 1)
+
+    @classmethod
+    def distribution(cls):
+        """(lower, upper, count) for every non-empty bucket, lowest first"""
+        width = cls.width()
+        return [
+            (lower, lower + width, count)
+            for lower, count in cls.objects.filter(count__gt=0).values_list('lower', 'count')
+        ]
+
+    @classmethod
+    def percentile(cls, points):
+        """
+        Approximate share of leaderboard entries with fewer points, read from the
+        buckets alone. Returns (percentile, total entries).
+        """
+        buckets = cls.objects.filter(count__gt=0).values_list('lower', 'count')
+        lower = cls.lower_bound(points)
+        total = below = 0
+        for bucket_lower, count in buckets:
+            total += count
+            if bucket_lower < lower:
+                below += count
+            elif bucket_lower == lower:
+                # Assume scores are spread evenly within the user's own bucket
+                below += count * (points - lower) / cls.width()
+        if not total:
+            return None, 0
+        return below / total * 100, total
+
+
+class DailyActivity(models.Model):
+    """
+    What a user did on one day: challenges started, submissions made and
+    challenges completed. Counters are incremented as the events happen, so a
+    year of activity is one range read on (user, day).
+    """
+    KIND_CHOICES = [
+        ('started', 'Started'),
+        ('submitted', 'Submitted'),
+        ('completed', 'Completed')
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity')
+    day = models.DateField()
+    started = models.IntegerField(default=0)
+    submitted = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'day')
+        ordering = ['day']
+
+    def __str__(self):
+        return f"{self.user.username}'s activity on {self.day}"
+
+    @property
+    def total(self):
+        return self.started + self.submitted + self.completed
+
+    @classmethod
+    def record(cls, user, kind, when=None):
+        """Count one event of the given kind on the day it happened"""
+        day = timezone.localdate(when)
+        lookup = {'user': user, 'day': day}
+        increment = {kind: models.F(kind) + 1}
+        if not cls.objects.filter(**lookup).update(**increment):
+            _, created = cls.objects.get_or_create(**lookup, defaults={kind: 1})
+            if not created:
+                cls.objects.filter(**lookup).update(**increment)
+            else:
+                # Only the first event of a day can change the streak
+                UserStreak.record_day(user, day)
+
+
+class UserStreak(models.Model):
+    """
+    A user's run of consecutive active days, advanced once per day by the
+    first DailyActivity of that day instead of being derived from history.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='streak')
+    current = models.IntegerField(default=0)
+    longest = models.IntegerField(default=0)
+    current_start = models.DateField(null=True, blank=True)
+    last_active_day = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s streak: {self.current} days"
+
+    def advance(self, day):
+        """Extend the streak with an active day later than the last one, or start a new run after a gap"""
+        if self.last_active_day is not None and day - self.last_active_day == timedelta(days=1):
+            self.current += 1
+        else:
+            self.current = 1
+            self.current_start = day
+        self.longest = max(self.longest, self.current)
+        self.last_active_day = day
+
+    @classmethod
+    def record_day(cls, user, day):
+        """Count an active day towards the user's streak"""
+        with transaction.atomic():
+            streak, _ = cls.objects.select_for_update().get_or_create(user=user)
+            # Already counted, or a late event for an earlier day
+            if streak.last_active_day is None or day > streak.last_active_day:
+                streak.advance(day)
+                streak.save()
+        return streak
+
+    def current_on(self, day):
+        """The streak as of the given day: still alive if the user was active that day or the day before"""
+        if self.last_active_day is None or day - self.last_active_day > timedelta(days=1):
+            return 0
+        return self.current
+
+    @classmethod
+    def from_days(cls, user_id, days):
+        """Build an unsaved streak from a user's active days in ascending order (for backfills)"""
+        streak = cls(user_id=user_id)
+        for day in days:
+            streak.advance(day)
+        return streak
+
+
+class SubmissionSignature(models.Model):
+    """
+    MinHash signature of a submission's code, used to find near-duplicate
+    submissions without comparing every pair
+    """
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    minhash = models.BinaryField(help_text="uint32 MinHash values")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signature of submission {self.submission_id}"
+
+
+class SubmissionBand(models.Model):
+    """
+    One LSH band key of a signature. Submissions to the same challenge sharing
+    a key are near-duplicate candidates, found with one indexed lookup.
+    """
+    signature = models.ForeignKey(SubmissionSignature, on_delete=models.CASCADE, related_name='bands')
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['challenge', 'key'])
+        ]
+
+    def __str__(self):
+        return f"Band {self.key} of submission {self.signature_id}"
@@ -0,0 +1,206 @@
+import logging
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from challenges.models import Challenge
+from createthon.executors import BoundedExecutor, Saturated
+from progress import minhash
+from progress.models import Submission, SubmissionBand, SubmissionSignature
+
+logger = logging.getLogger(__name__)
+
+signature_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'PLAGIARISM_WORKERS', 2),
+    max_pending=getattr(settings, 'PLAGIARISM_MAX_PENDING', 200),
+    thread_name_prefix='submission-signatures'
+)
+
+
+def signature_options():
+    """Keyword arguments for minhash.signature from settings"""
+    return {
+        'num_perm': getattr(settings, 'PLAGIARISM_MINHASH_PERMUTATIONS', 128),
+        'shingle_size': getattr(settings, 'PLAGIARISM_SHINGLE_SIZE', 5)
+    }
+
+
+def lsh_bands():
+    return getattr(settings, 'PLAGIARISM_LSH_BANDS', 32)
+
+
+def default_threshold():
+    return getattr(settings, 'PLAGIARISM_SIMILARITY_THRESHOLD', 0.7)
+
+
+def store_signatures(entries, batch_size=1000):
+    """
+    Replace the signatures and band keys of the given submissions.
+    `entries` are (submission id, challenge id, user id, minhash array) tuples.
+    """
+    bands = lsh_bands()
+    signatures, band_rows = [], []
+    for submission_id, challenge_id, user_id, signature in entries:
+        signatures.append(SubmissionSignature(
+            submission_id=submission_id,
+            challenge_id=challenge_id,
+            user_id=user_id,
+            minhash=signature.tobytes()
+        ))
+        band_rows.extend(
+            SubmissionBand(signature_id=submission_id, challenge_id=challenge_id, key=key)
+            for key in minhash.band_keys(signature, bands)
+        )
+
+    with transaction.atomic():
+        SubmissionSignature.objects.filter(submission_id__in=[s.submission_id for s in signatures]).delete()
+        SubmissionSignature.objects.bulk_create(signatures, batch_size=batch_size)
+        SubmissionBand.objects.bulk_create(band_rows, batch_size=batch_size)
+
+
+def index_submission(submission_id):
+    """Compute and store the signature of one submission"""
+    submission = Submission.objects.select_related('blob').filter(pk=submission_id).first()
+    if submission is None:
+        return
+    signature = minhash.signature(submission.code, **signature_options())
+    store_signatures([(submission.pk, submission.challenge_id, submission.user_id, signature)])
+
+
+def _run_in_worker(submission_id):
+    close_old_connections()
+    try:
+        index_submission(submission_id)
+    except Exception:
+        logger.exception("Signature generation failed for submission %s", submission_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_signature(submission):
+    """
+    Sign a new submission off the request path once it commits. When the pool
+    is full it stays unsigned for rebuild_submission_signatures --missing.
+    """
+    def submit():
+        try:
+            signature_executor.submit(_run_in_worker, submission.pk)
+        except Saturated:
+            logger.warning(
+                "Signature pool full, submission %s left for rebuild_submission_signatures", submission.pk
+            )
+
+    transaction.on_commit(submit)
+
+
+def reference_signatures(challenge_id):
+    """
+    Signatures of the challenge's solution and starter code. Every correct
+    answer and every untouched template shares them, so they are not evidence
+    of copying and are left out of comparisons.
+    """
+    codes = Challenge.objects.filter(pk=challenge_id).values_list('solution', 'code_template').first()
+    return [minhash.signature(code, **signature_options()).tobytes() for code in codes or ()]
+
+
+def _minhashes(rows, length):
+    """Signature matrix for (id, user id, minhash bytes) rows, skipping ones built with other settings"""
+    rows = [(pk, user_id, bytes(data)) for pk, user_id, data in rows if len(data) == length * 4]
+    matrix = np.frombuffer(b''.join(data for _, _, data in rows), dtype=np.uint32).reshape(-1, length)
+    return [pk for pk, _, _ in rows], [user_id for _, user_id, _ in rows], matrix
+
+
+def near_duplicates(submission_id, threshold=None):
+    """
+    Submissions by other users to the same challenge whose estimated similarity
+    to the given submission is at least the threshold, most similar first.
+    Candidates come from one indexed band-key lookup rather than a scan.
+    Returns None when the submission has no signature yet.
+    """
+    threshold = default_threshold() if threshold is None else threshold
+    signature = SubmissionSignature.objects.filter(pk=submission_id).first()
+    if signature is None:
+        return None
+    own = np.frombuffer(bytes(signature.minhash), dtype=np.uint32)
+
+    candidate_ids = SubmissionBand.objects.filter(
+        challenge_id=signature.challenge_id,
+        key__in=minhash.band_keys(own, lsh_bands())
+    ).values('signature_id')
+    rows = SubmissionSignature.objects.filter(
+        pk__in=candidate_ids
+    ).exclude(
+        user_id=signature.user_id
+    ).exclude(
+        minhash__in=reference_signatures(signature.challenge_id)
+    ).values_list('submission_id', 'user_id', 'minhash')
+    ids, user_ids, matrix = _minhashes(rows, len(own))
+    scores = minhash.similarity(own, matrix)
+
+    matches = [
+        {'submission': pk, 'user': user_id, 'similarity': float(score)}
+        for pk, user_id, score in zip(ids, user_ids, scores)
+        if score >= threshold
+    ]
+    return sorted(matches, key=lambda match: -match['similarity'])
+
+
+def challenge_near_duplicates(challenge_id, threshold=None):
+    """
+    Groups of users with near-duplicate submissions to a challenge, most
+    similar first, each with one submission per user. Identical code is
+    collapsed to one signature before any pairs are compared, so a copy shared
+    by many users is one group rather than every pair of them, and code
+    matching the solution or template is skipped. Only signatures sharing an
+    LSH band key are compared.
+    """
+    threshold = default_threshold() if threshold is None else threshold
+    length = getattr(settings, 'PLAGIARISM_MINHASH_PERMUTATIONS', 128)
+    rows = SubmissionSignature.objects.filter(
+        challenge_id=challenge_id
+    ).exclude(
+        minhash__in=reference_signatures(challenge_id)
+    ).order_by('submission_id').values_list('submission_id', 'user_id', 'minhash')
+
+    # Distinct signature -> {user id: that user's latest submission with it}
+    authors = defaultdict(dict)
+    for submission_id, user_id, data in rows.iterator(chunk_size=5000):
+        data = bytes(data)
+        if len(data) == length * 4:
+            authors[data][user_id] = submission_id
+    if not authors:
+        return []
+    signatures = list(authors)
+    matrix = np.frombuffer(b''.join(signatures), dtype=np.uint32).reshape(-1, length)
+
+    buckets = defaultdict(list)
+    bands = lsh_bands()
+    for i, row in enumerate(matrix):
+        for key in minhash.band_keys(row, bands):
+            buckets[key].append(i)
+    pairs = np.array(
+        sorted({pair for members in buckets.values() for pair in combinations(members, 2)}),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    scores = (matrix[pairs[:, 0]] == matrix[pairs[:, 1]]).mean(axis=1)
+
+    best = {}
+
+    def report(submissions, similarity):
+        users = frozenset(submissions)
+        if len(users) > 1 and (users not in best or similarity > best[users]['similarity']):
+            best[users] = {
+                'users': sorted(users),
+                'submissions': [submissions[user_id] for user_id in sorted(users)],
+                'similarity': similarity
+            }
+
+    for submissions in authors.values():
+        report(submissions, 1.0)
+    for (i, j), score in zip(pairs.tolist(), scores.tolist()):
+        if score >= threshold:
+            report({**authors[signatures[j]], **authors[signatures[i]]}, score)
+    return sorted(best.values(), key=lambda group: -group['similarity'])
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+
+from createthon.versioning import VersionStamp
+from progress.models import Leaderboard
+
+version_stamp = VersionStamp('global-ranking-version')
+
+
+class RankingSnapshot:
+    """
+    One consistent build of the global ranking. Never modified after it is
+    built, so a reader holding one sees ids, points and positions from the
+    same build however often the ranking is rebuilt meanwhile.
+    """
+
+    def __init__(self, user_ids=(), points=(), completed=(), version=None, built_at=float('-inf')):
+        self.user_ids = tuple(user_ids)
+        self.points = tuple(points)
+        self.completed = tuple(completed)
+        self.position = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.version = version
+        self.built_at = built_at
+
+    def rank(self, user_ids):
+        """Global positions of the given users that are on the board, best first"""
+        position = self.position
+        return sorted(position[user_id] for user_id in user_ids if user_id in position)
+
+
+class GlobalRanking:
+    """
+    In-process copy of the leaderboard sorted by score, used to rank any
+    subset of users (a cohort, a group of friends) without a query per group.
+
+    Users are held in rank order with a user id -> position map, so ranking a
+    group is a lookup per member and a sort of their positions. Score changes
+    bump a version stamp in the cache; each process rebuilds its copy on the
+    next lookup after seeing a new stamp, at most once per
+    LEADERBOARD_RANKING_REFRESH_INTERVAL seconds. Each build is a new
+    RankingSnapshot swapped in with one assignment.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = RankingSnapshot()
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, 'LEADERBOARD_RANKING_REFRESH_INTERVAL', 5)
+
+    def _build(self, version):
+        rows = Leaderboard.objects.order_by(*Leaderboard.RANK_ORDER).values_list('user_id', 'total_points', 'challenges_completed')
+        user_ids, points, completed = [], [], []
+        for user_id, total_points, challenges_completed in rows.iterator(chunk_size=5000):
+            user_ids.append(user_id)
+            points.append(total_points)
+            completed.append(challenges_completed)
+        return RankingSnapshot(user_ids, points, completed, version, time.monotonic())
+
+    def _stale(self, snapshot, version):
+        return version != snapshot.version and time.monotonic() - snapshot.built_at >= self.refresh_interval
+
+    def refresh(self):
+        """The current snapshot, rebuilt first if scores changed and it is old enough"""
+        version = version_stamp.current()
+        snapshot = self._snapshot
+        if self._stale(snapshot, version):
+            with self._lock:
+                snapshot = self._snapshot
+                if self._stale(snapshot, version):
+                    snapshot = self._snapshot = self._build(version)
+        return snapshot
+
+    def invalidate(self):
+        version_stamp.bump()
+
+
+global_ranking = GlobalRanking()
+
+
+def invalidate_global_ranking():
+    """Mark every process's ranking stale once the current transaction commits"""
+    version_stamp.bump_on_commit()
@@ -1,8 +1,11 @@
 
 from rest_framework import serializers
-from progress.models import UserProgress, Achievement, UserAchievement, Leaderboard
+from progress.models import (
+    UserProgress, Achievement, UserAchievement, Leaderboard, LeaderboardBucket, Submission, DailyActivity, UserStreak
+)
 from challenges.serializers import ChallengeSerializer,UserBasicSerializer
 from challenges.models import Challenge
+from createthon.images import variant_urls
 
 class UserProgressSerializer(serializers.ModelSerializer):
     challenge = ChallengeSerializer(read_only=True)
@@ -20,10 +23,22 @@ class UserProgressSerializer(serializers.ModelSerializer):
             'last_attempt_time', 'time_spent'
         ]
 
+class SubmissionSerializer(serializers.ModelSerializer):
+    code = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Submission
+        fields = ['id', 'challenge', 'code', 'status', 'passed', 'details', 'time_spent', 'submitted_at']
+
 class AchievementSerializer(serializers.ModelSerializer):
+    badge_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Achievement
-        fields = ['id', 'name', 'description', 'points_required', 'badge_icon']
+        fields = ['id', 'name', 'description', 'points_required', 'badge_icon', 'badge_variants']
+
+    def get_badge_variants(self, obj):
+        return variant_urls(obj.badge_variants)
 
 class UserAchievementSerializer(serializers.ModelSerializer):
     achievement = AchievementSerializer(read_only=True)
@@ -38,3 +53,23 @@ class LeaderboardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Leaderboard
         fields = ['id', 'user', 'total_points', 'challenges_completed', 'ranking']
+
+class LeaderboardBucketSerializer(serializers.ModelSerializer):
+    user = UserBasicSerializer(read_only=True)
+    ranking = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LeaderboardBucket
+        fields = ['id', 'user', 'total_points', 'challenges_completed', 'ranking', 'period', 'bucket_start']
+
+class DailyActivitySerializer(serializers.ModelSerializer):
+    total = serializers.ReadOnlyField()
+
+    class Meta:
+        model = DailyActivity
+        fields = ['day', 'started', 'submitted', 'completed', 'total']
+
+class UserStreakSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserStreak
+        fields = ['current', 'longest', 'current_start', 'last_active_day']
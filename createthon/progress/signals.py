@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from createthon.images import enqueue_variants
+from progress.models import Achievement, Leaderboard, ScoreHistogramBucket, Submission
+from progress.plagiarism import enqueue_signature
+from progress.ranking import invalidate_global_ranking
+
+# Sent once a submission has its verdict, with `submission` and `passed`
+submission_judged = Signal()
+
+
+@receiver(post_save, sender=Achievement)
+def generate_badge_variants(sender, instance, raw, **kwargs):
+    if not raw:
+        enqueue_variants(instance, 'badge_icon', 'badge_variants')
+
+
+@receiver(post_save, sender=Submission)
+def sign_submission(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        enqueue_signature(instance)
+
+
+@receiver(post_save, sender=Leaderboard)
+def move_in_histogram(sender, instance, created, raw, update_fields, **kwargs):
+    if raw or (update_fields is not None and 'total_points' not in update_fields):
+        return
+    previous = None if created else getattr(instance, '_histogram_points', None)
+    if previous is None and not created:
+        # Saved without its points ever being loaded; rebuild_score_histogram reconciles
+        return
+    ScoreHistogramBucket.move(previous, instance.total_points)
+    instance._histogram_points = instance.total_points
+
+
+@receiver(post_delete, sender=Leaderboard)
+def remove_from_histogram(sender, instance, **kwargs):
+    ScoreHistogramBucket.add(instance.total_points, -1)
+
+
+@receiver(post_save, sender=Leaderboard)
+@receiver(post_delete, sender=Leaderboard)
+def refresh_ranking_on_change(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'total_points', 'challenges_completed'} & set(update_fields):
+        # Rank-only saves don't change what the global ranking is built from
+        return
+    invalidate_global_ranking()
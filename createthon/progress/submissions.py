@@ -0,0 +1,299 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from createthon.executors import BoundedExecutor, Saturated
+from progress.models import CodeBlob, DailyActivity, Leaderboard, LeaderboardBucket, Submission, UserProgress
+from progress.signals import submission_judged
+
+logger = logging.getLogger(__name__)
+
+validation_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'SUBMISSION_WORKERS', 4),
+    max_pending=getattr(settings, 'SUBMISSION_MAX_PENDING', 100),
+    thread_name_prefix='submission-validation'
+)
+
+
+class ValidationOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Submission validation is overloaded, try again shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        # Picked up by DRF's exception handler as the Retry-After header
+        self.wait = wait
+
+
+class _InlineValidations:
+    """Count of synchronous validations running in this process's request threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.count += 1
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.count -= 1
+
+
+inline_validations = _InlineValidations()
+
+
+def validate_inline(challenge, code):
+    """Validate on the request thread, counted in the backlog admission control sees"""
+    with inline_validations:
+        return challenge.validate_submission(code)
+
+
+def validation_backlog():
+    """Submissions waiting for or undergoing validation, including synchronous ones"""
+    if getattr(settings, 'SUBMISSION_QUEUE', 'thread') == 'thread':
+        return validation_executor.backlog + inline_validations.count
+
+    # The queue worker runs elsewhere, so read its backlog from the table (briefly cached)
+    backlog = cache.get('submission-backlog')
+    if backlog is None:
+        backlog = Submission.objects.filter(status__in=['pending', 'processing']).count()
+        cache.set('submission-backlog', backlog, 2)
+    return backlog + inline_validations.count
+
+
+def backlog_limit():
+    """
+    SUBMISSION_BACKLOG_LIMIT, capped in thread mode at what the pool can hold so
+    a limit set above the pool's capacity still sheds load
+    """
+    limit = getattr(settings, 'SUBMISSION_BACKLOG_LIMIT', 80)
+    if getattr(settings, 'SUBMISSION_QUEUE', 'thread') == 'thread':
+        limit = min(limit, validation_executor.max_workers + validation_executor.max_pending)
+    return limit
+
+
+def check_admission():
+    """Shed new submissions with a 503 and Retry-After while the validation backlog is too deep"""
+    if validation_backlog() >= backlog_limit():
+        raise ValidationOverloaded(wait=getattr(settings, 'SUBMISSION_BACKLOG_RETRY_AFTER', 5))
+
+
+def _status_changes(user_progress, passed, now):
+    """Progress status fields to write for a verdict (passed is None while pending)"""
+    if user_progress.status == 'completed':
+        # A later attempt never takes away an earlier completion
+        return {}
+    if passed is None:
+        return {'status': 'submitted'}
+    if passed:
+        return {'status': 'completed', 'completed_at': now}
+    return {'status': 'failed'}
+
+
+def _on_first_completion(user_progress):
+    """Achievement and leaderboard work that only runs the first time a challenge is completed"""
+    user_progress.award_achievements()
+    Leaderboard.refresh_for_user(user_progress.user)
+    LeaderboardBucket.record_completion(user_progress)
+    DailyActivity.record(user_progress.user, 'completed', user_progress.completed_at)
+
+
+def record_submission(user, challenge, code, time_spent, validation_result=None):
+    """
+    Append a submission to the log and apply it to the user's progress in one
+    short transaction, writing the progress row once.
+
+    With a validation result the verdict is applied right away; without one the
+    submission is left pending for a validation worker.
+    Returns the submission and the updated progress.
+    """
+    now = timezone.now()
+    passed = validation_result['passed'] if validation_result else None
+
+    with transaction.atomic():
+        # Identical code shares one stored blob
+        submission = Submission.objects.create(
+            user=user,
+            challenge=challenge,
+            blob=CodeBlob.store(code),
+            status='done' if validation_result else 'pending',
+            passed=passed,
+            details=validation_result['details'] if validation_result else '',
+            time_spent=time_spent,
+            submitted_at=now
+        )
+
+        # Lock the row so the first-completion check cannot race a parallel submission
+        user_progress, created = UserProgress.objects.select_for_update().get_or_create(
+            user=user,
+            challenge=challenge,
+            defaults={
+                'latest_submission': submission,
+                'time_spent': time_spent,
+                'attempts': 1,
+                **_status_changes(UserProgress(), passed, now)
+            }
+        )
+        newly_completed = bool(passed) and (created or user_progress.status != 'completed')
+
+        if not created:
+            UserProgress.objects.filter(pk=user_progress.pk).update(
+                latest_submission=submission,
+                time_spent=F('time_spent') + time_spent,
+                attempts=F('attempts') + 1,
+                last_attempt_time=now,
+                **_status_changes(user_progress, passed, now)
+            )
+            user_progress.refresh_from_db()
+
+    DailyActivity.record(user, 'submitted', now)
+    if newly_completed:
+        _on_first_completion(user_progress)
+    if passed is not None:
+        submission_judged.send(sender=Submission, submission=submission, passed=passed)
+
+    return submission, user_progress
+
+
+def apply_verdict(submission, validation_result):
+    """Store the verdict for a pending submission and update the user's progress"""
+    now = timezone.now()
+    passed = validation_result['passed']
+
+    with transaction.atomic():
+        user_progress = UserProgress.objects.select_for_update().get(
+            user_id=submission.user_id,
+            challenge_id=submission.challenge_id
+        )
+        Submission.objects.filter(pk=submission.pk).update(
+            status='done',
+            passed=passed,
+            details=validation_result['details']
+        )
+
+        changes = _status_changes(user_progress, passed, now)
+        if not passed and user_progress.latest_submission_id != submission.pk:
+            # A newer attempt is in flight and owns the status
+            changes = {}
+        newly_completed = passed and user_progress.status != 'completed'
+
+        if changes:
+            UserProgress.objects.filter(pk=user_progress.pk).update(**changes)
+            user_progress.refresh_from_db()
+
+    if newly_completed:
+        _on_first_completion(user_progress)
+    submission_judged.send(sender=Submission, submission=submission, passed=passed)
+
+    return user_progress
+
+
+def process_submission(submission_id):
+    """Validate one pending submission; safe to call from any worker"""
+    # Claim the submission so two workers never validate it twice
+    claimed = Submission.objects.filter(
+        pk=submission_id,
+        status='pending'
+    ).update(status='processing', claimed_at=timezone.now())
+    if not claimed:
+        return
+
+    submission = Submission.objects.select_related('challenge', 'blob').get(pk=submission_id)
+    try:
+        validation_result = submission.challenge.validate_submission(submission.code)
+    except Exception:
+        logger.exception("Validation failed for submission %s", submission_id)
+        Submission.objects.filter(pk=submission_id).update(
+            status='error',
+            details='Submission could not be validated'
+        )
+        return
+
+    apply_verdict(submission, validation_result)
+
+
+def _run_in_worker(submission_id):
+    close_old_connections()
+    try:
+        process_submission(submission_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_submission(submission):
+    """
+    Hand a pending submission to the in-process worker pool once the
+    transaction commits. With SUBMISSION_QUEUE = 'database' it stays pending
+    for the process_submissions command; when the pool is full it stays
+    pending for the next sweep.
+    """
+    if getattr(settings, 'SUBMISSION_QUEUE', 'thread') != 'thread':
+        return
+
+    def submit():
+        try:
+            validation_executor.submit(_run_in_worker, submission.pk)
+        except Saturated:
+            logger.warning("Validation pool full, submission %s left for the next sweep", submission.pk)
+        sweep_submissions()
+
+    transaction.on_commit(submit)
+
+
+def reclaim_stale_claims():
+    """
+    Put submissions whose worker died mid-validation back to pending. A claim
+    older than SUBMISSION_CLAIM_TIMEOUT is assumed lost.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'SUBMISSION_CLAIM_TIMEOUT', 60))
+    reclaimed = Submission.objects.filter(
+        status='processing',
+        claimed_at__lt=cutoff
+    ).update(status='pending', claimed_at=None)
+    if reclaimed:
+        logger.warning("Reclaimed %s submissions from workers that stopped", reclaimed)
+    return reclaimed
+
+
+_sweep_lock = threading.Lock()
+_last_sweep = float('-inf')
+
+
+def sweep_submissions(force=False):
+    """
+    Thread mode's recovery path: reclaim stale claims and hand submissions left
+    pending for longer than SUBMISSION_SWEEP_INTERVAL (shed by a full pool, or
+    queued in a process that restarted) back to the pool. Runs at most once per
+    interval per process; claiming makes handing out a submission twice harmless.
+    """
+    global _last_sweep
+    interval = getattr(settings, 'SUBMISSION_SWEEP_INTERVAL', 30)
+    with _sweep_lock:
+        if not force and time.monotonic() - _last_sweep < interval:
+            return 0
+        _last_sweep = time.monotonic()
+
+    reclaim_stale_claims()
+    room = validation_executor.max_workers + validation_executor.max_pending - validation_executor.backlog
+    stale = list(Submission.objects.filter(
+        status='pending',
+        submitted_at__lt=timezone.now() - timedelta(seconds=interval)
+    ).order_by('submitted_at').values_list('id', flat=True)[:max(room, 0)])
+    for submission_id in stale:
+        try:
+            validation_executor.submit(_run_in_worker, submission_id)
+        except Saturated:
+            break
+    return len(stale)
@@ -1,3 +1,362 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from challenges.models import Category, Challenge
+from progress.models import (
+    CodeBlob, DailyActivity, Leaderboard, LeaderboardBucket, ScoreHistogramBucket, Submission, UserProgress, UserStreak
+)
+from progress.plagiarism import challenge_near_duplicates, index_submission
+from progress.ranking import GlobalRanking
+from progress.submissions import backlog_limit, inline_validations, validation_executor
+from users.provisioning import provision_users
+
+
+@override_settings(SUBMISSION_QUEUE='thread', SUBMISSION_BACKLOG_LIMIT=2, SUBMISSION_BACKLOG_RETRY_AFTER=7)
+class AdmissionControlTests(TransactionTestCase):
+    """Submissions are shed with 503 and Retry-After once validation is backed up"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Python')
+        self.challenge = Challenge.objects.create(
+            title='Sum', description='Add numbers', difficulty='beginner', points=10,
+            category=category, status='published', solution='print(1)'
+        )
+        self.path = f'/challenges/challenges/{self.challenge.pk}/submit_challenge/'
+
+    def _client(self, username):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username, f'{username}@example.com', 'x'))
+        return client
+
+    def test_synchronous_validations_fill_the_backlog_and_shed_the_next_request(self):
+        started = threading.Semaphore(0)
+        release = threading.Event()
+
+        def slow_validation(challenge, code):
+            started.release()
+            release.wait(10)
+            return {'passed': False, 'details': ''}
+
+        clients = [self._client(f'busy{i}') for i in range(2)]
+        shed_client = self._client('late')
+
+        def submit(client):
+            try:
+                return client.post(self.path, {'submission_code': 'x'}, format='json').status_code
+            finally:
+                connection.close()
+
+        with mock.patch.object(Challenge, 'validate_submission', slow_validation), \
+                ThreadPoolExecutor(max_workers=2) as pool:
+            busy = [pool.submit(submit, client) for client in clients]
+            for _ in clients:
+                self.assertTrue(started.acquire(timeout=10))
+            self.assertEqual(inline_validations.count, 2)
+
+            response = shed_client.post(self.path, {'submission_code': 'x'}, format='json')
+            release.set()
+            busy_codes = [future.result() for future in busy]
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(busy_codes, [200, 200])
+        self.assertEqual(inline_validations.count, 0)
+        self.assertEqual(shed_client.post(self.path, {'submission_code': 'x'}, format='json').status_code, 200)
+
+    @override_settings(SUBMISSION_BACKLOG_LIMIT=10 ** 6)
+    def test_limit_above_pool_capacity_is_capped(self):
+        self.assertEqual(backlog_limit(), validation_executor.max_workers + validation_executor.max_pending)
+
+
+
+@override_settings(SCORE_HISTOGRAM_BUCKET_WIDTH=50)
+class ScoreHistogramTests(TestCase):
+    """Every way a leaderboard entry is created, edited or deleted keeps the buckets in step"""
+
+    def counts(self):
+        return dict(ScoreHistogramBucket.objects.exclude(count=0).values_list('lower', 'count'))
+
+    def test_provisioned_entries_are_counted_and_removed(self):
+        rows = [
+            {'username': f'cohort{i}', 'email': f'cohort{i}@example.com', 'password': 'A-long-passphrase-42'}
+            for i in range(5)
+        ]
+        result = provision_users(rows, workers=1, create_leaderboard=True)
+
+        self.assertEqual(result['created'], 5)
+        self.assertEqual(self.counts(), {0: 5})
+        User.objects.filter(username__startswith='cohort').delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_direct_edits_move_the_entry(self):
+        user = User.objects.create_user('edited', 'edited@example.com', 'x')
+        Leaderboard.objects.create(user=user)
+
+        entry = Leaderboard.objects.get(user=user)
+        entry.total_points = 120
+        entry.save()
+        entry.total_points = 130
+        entry.save()
+        self.assertEqual(self.counts(), {100: 1})
+
+        Leaderboard.update_rankings()
+        entry.delete()
+        self.assertEqual(self.counts(), {})
+
+
+class LeaderboardRankingTests(TestCase):
+    """A solve re-ranks only the entries it moves past, and the board stays in rank order"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Python')
+        self.challenges = [
+            Challenge.objects.create(
+                title=f'Task {i}', description='Solve it', difficulty='beginner', points=10 * i,
+                category=category, status='published'
+            )
+            for i in range(1, 5)
+        ]
+        self.users = [User.objects.create_user(f'player{i}', f'player{i}@example.com', 'x') for i in range(6)]
+
+    def solve(self, user, challenge):
+        UserProgress.objects.create(user=user, challenge=challenge, status='completed', completed_at=timezone.now())
+        Leaderboard.refresh_for_user(user)
+
+    def rankings(self):
+        return list(Leaderboard.objects.order_by('ranking').values_list('user__username', 'ranking'))
+
+    def expected(self):
+        ordered = Leaderboard.objects.order_by(*Leaderboard.RANK_ORDER).values_list('user__username', flat=True)
+        return [(username, i) for i, username in enumerate(ordered, start=1)]
+
+    def test_rankings_match_a_full_renumbering_after_every_solve(self):
+        solves = [(0, 0), (1, 1), (2, 0), (3, 3), (1, 0), (4, 2), (5, 1), (0, 3), (2, 2), (5, 0)]
+        for user, challenge in solves:
+            self.solve(self.users[user], self.challenges[challenge])
+            self.assertEqual(self.rankings(), self.expected())
+
+    def test_entries_outside_the_moved_range_are_not_rewritten(self):
+        for user, challenge in [(0, 3), (1, 2), (2, 1), (3, 0), (4, 0)]:
+            self.solve(self.users[user], self.challenges[challenge])
+        # Marker ranks that only a renumbering of the whole board would overwrite
+        Leaderboard.objects.filter(user__in=[self.users[0], self.users[4]]).update(ranking=99)
+
+        # player3 overtakes player1 and player2; player0 stays ahead and player4 behind
+        self.solve(self.users[3], self.challenges[1])
+
+        self.assertEqual(self.rankings()[:3], [('player3', 2), ('player1', 3), ('player2', 4)])
+        self.assertEqual(Leaderboard.objects.filter(ranking=99).count(), 2)
+        call_command('rebuild_leaderboard_rankings', stdout=StringIO())
+        self.assertEqual(self.rankings(), self.expected())
+
+    def test_provisioned_entries_are_ranked_last(self):
+        self.solve(self.users[0], self.challenges[0])
+        rows = [
+            {'username': f'cohort{i}', 'email': f'cohort{i}@example.com', 'password': 'A-long-passphrase-42'}
+            for i in range(3)
+        ]
+        provision_users(rows, workers=1, create_leaderboard=True)
+
+        self.assertEqual(self.rankings(), self.expected())
+
+
+@override_settings(LEADERBOARD_RANKING_REFRESH_INTERVAL=0)
+class GlobalRankingTests(TestCase):
+    """Each rebuild is a new snapshot, and only score changes trigger one"""
+
+    def setUp(self):
+        cache.clear()
+        self.ranking = GlobalRanking()
+        self.users = [User.objects.create_user(f'ranked{i}', f'ranked{i}@example.com', 'x') for i in range(3)]
+        for points, user in zip((30, 10, 20), self.users):
+            Leaderboard.objects.create(user=user, total_points=points, challenges_completed=1)
+
+    def test_held_snapshot_is_unaffected_by_a_rebuild(self):
+        held = self.ranking.refresh()
+        self.assertEqual(held.rank([user.pk for user in self.users]), [0, 1, 2])
+        self.assertEqual(held.user_ids[held.position[self.users[2].pk]], self.users[2].pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Leaderboard.objects.filter(user=self.users[1]).delete()
+        rebuilt = self.ranking.refresh()
+
+        self.assertIsNot(rebuilt, held)
+        self.assertEqual(rebuilt.user_ids, (self.users[0].pk, self.users[2].pk))
+        self.assertEqual(held.user_ids, (self.users[0].pk, self.users[2].pk, self.users[1].pk))
+        self.assertEqual(held.points, (30, 20, 10))
+
+    def test_only_score_changes_invalidate_the_ranking(self):
+        snapshot = self.ranking.refresh()
+        entry = Leaderboard.objects.get(user=self.users[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.ranking = 3
+            entry.save(update_fields=['ranking', 'last_updated'])
+            Leaderboard.update_rankings()
+        self.assertIs(self.ranking.refresh(), snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.total_points = 40
+            entry.save(update_fields=['total_points'])
+        self.assertEqual(self.ranking.refresh().user_ids[0], self.users[1].pk)
+
+
+class LeaderboardWindowTests(TestCase):
+    """Completions land in the day, week and month they were made in, right up to the edge"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Python')
+        self.challenges = [
+            Challenge.objects.create(
+                title=f'Task {points}', description='Solve it', difficulty='beginner', points=points,
+                category=category, status='published'
+            )
+            for points in (10, 20, 15)
+        ]
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'x')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'x')
+        # Sunday 31 May 2026 ends both a week and a month
+        self.complete(self.alice, self.challenges[0], datetime(2026, 5, 31, 23, 59, 59))
+        self.complete(self.alice, self.challenges[1], datetime(2026, 6, 1, 0, 0, 0))
+        self.complete(self.bob, self.challenges[2], datetime(2026, 6, 1, 12, 0, 0))
+        self.client = APIClient()
+        self.client.force_authenticate(self.bob)
+
+    def complete(self, user, challenge, when):
+        LeaderboardBucket.record_completion(UserProgress.objects.create(
+            user=user, challenge=challenge, status='completed',
+            completed_at=when.replace(tzinfo=dt_timezone.utc)
+        ))
+
+    def board(self, window, start):
+        response = self.client.get('/progress/leaderboard/', {'window': window, 'start': start})
+        self.assertEqual(response.status_code, 200)
+        return [(row['user']['username'], row['total_points'], row['ranking']) for row in response.data]
+
+    def test_last_second_of_a_window_stays_in_it(self):
+        self.assertEqual(self.board('day', '2026-05-31'), [('alice', 10, 1)])
+        self.assertEqual(self.board('week', '2026-05-25'), [('alice', 10, 1)])
+        self.assertEqual(self.board('month', '2026-05-01'), [('alice', 10, 1)])
+
+    def test_first_second_of_a_window_starts_the_next(self):
+        self.assertEqual(self.board('day', '2026-06-01'), [('alice', 20, 1), ('bob', 15, 2)])
+        self.assertEqual(self.board('month', '2026-06-01'), [('alice', 20, 1), ('bob', 15, 2)])
+
+    def test_any_day_selects_the_window_containing_it(self):
+        # Sunday 7 June is the last day of the week starting Monday 1 June
+        self.assertEqual(self.board('week', '2026-06-07'), [('alice', 20, 1), ('bob', 15, 2)])
+        self.assertEqual(self.board('month', '2026-06-30'), [('alice', 20, 1), ('bob', 15, 2)])
+        self.assertEqual(self.board('week', '2026-06-08'), [])
+
+    def test_bad_window_or_start_is_rejected(self):
+        self.assertEqual(self.client.get('/progress/leaderboard/', {'window': 'year'}).status_code, 400)
+        self.assertEqual(
+            self.client.get('/progress/leaderboard/', {'window': 'week', 'start': '31/05/2026'}).status_code, 400
+        )
+
+
+class UserStreakTests(TestCase):
+    """Streaks count consecutive local days, across midnight and never across a gap"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('streaker', 'streaker@example.com', 'x')
+
+    def record(self, *moments):
+        for moment in moments:
+            DailyActivity.record(self.user, 'submitted', moment.replace(tzinfo=dt_timezone.utc))
+        return UserStreak.objects.get(user=self.user)
+
+    def test_activity_either_side_of_midnight_extends_the_streak(self):
+        streak = self.record(
+            datetime(2026, 3, 9, 8, 0), datetime(2026, 3, 9, 23, 59, 59),
+            datetime(2026, 3, 10, 0, 0, 0), datetime(2026, 3, 10, 17, 30)
+        )
+
+        self.assertEqual((streak.current, streak.longest), (2, 2))
+        self.assertEqual((streak.current_start, streak.last_active_day), (date(2026, 3, 9), date(2026, 3, 10)))
+
+    def test_a_missed_day_starts_a_new_run(self):
+        streak = self.record(
+            datetime(2026, 3, 9, 12, 0), datetime(2026, 3, 10, 12, 0), datetime(2026, 3, 11, 12, 0),
+            datetime(2026, 3, 13, 0, 0, 1)
+        )
+
+        self.assertEqual((streak.current, streak.longest), (1, 3))
+        self.assertEqual(streak.current_start, date(2026, 3, 13))
+
+    def test_late_event_for_an_earlier_day_leaves_the_streak_alone(self):
+        self.record(datetime(2026, 3, 9, 12, 0), datetime(2026, 3, 10, 12, 0))
+        streak = self.record(datetime(2026, 3, 8, 12, 0))
+
+        self.assertEqual((streak.current, streak.last_active_day), (2, date(2026, 3, 10)))
+
+    def test_streak_lapses_once_a_whole_day_passes_without_activity(self):
+        streak = self.record(datetime(2026, 3, 9, 12, 0), datetime(2026, 3, 10, 12, 0))
+
+        self.assertEqual(streak.current_on(date(2026, 3, 10)), 2)
+        self.assertEqual(streak.current_on(date(2026, 3, 11)), 2)
+        self.assertEqual(streak.current_on(date(2026, 3, 12)), 0)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for today, current in [(date(2026, 3, 11), 2), (date(2026, 3, 12), 0)]:
+            with mock.patch.object(timezone, 'localdate', return_value=today):
+                response = client.get('/progress/user-progress/activity/')
+            self.assertEqual(response.data['streak']['current'], current)
+            self.assertEqual(response.data['streak']['longest'], 2)
+
+    def test_backfill_matches_the_live_streak(self):
+        days = [datetime(2026, 2, 27, 9, 0), datetime(2026, 2, 28, 23, 0), datetime(2026, 3, 1, 1, 0),
+                datetime(2026, 3, 3, 9, 0), datetime(2026, 3, 4, 9, 0)]
+        live = self.record(*days)
+
+        backfilled = UserStreak.from_days(self.user.pk, [moment.date() for moment in days])
+
+        self.assertEqual(
+            (backfilled.current, backfilled.longest, backfilled.current_start, backfilled.last_active_day),
+            (live.current, live.longest, live.current_start, live.last_active_day)
+        )
+        self.assertEqual((live.current, live.longest), (2, 3))
+
+
+class ChallengeNearDuplicatesTests(TestCase):
+    """Correct answers all share the solution, so only copies of other code are reported"""
+
+    def test_solution_is_skipped_and_shared_copies_are_one_group(self):
+        solution = "def solve(nums):\n    return sum(n * n for n in nums if n % 2 == 0)\n"
+        copy = "import sys\nx = [int(a) for a in sys.stdin.read().split()]\nprint(sum(v*v for v in x if v % 2 == 0))\n"
+        challenge = Challenge.objects.create(
+            title='Squares', description='Sum even squares', difficulty='beginner', points=10,
+            category=Category.objects.create(name='Python'), status='published',
+            solution=solution, code_template='def solve(nums):\n    pass\n'
+        )
+        codes = [solution] * 6 + [copy] * 3 + [challenge.code_template]
+        copiers = []
+        for i, code in enumerate(codes):
+            user = User.objects.create_user(f'student{i}', f'student{i}@example.com', 'x')
+            submission = Submission.objects.create(
+                user=user, challenge=challenge, blob=CodeBlob.store(code), status='done'
+            )
+            index_submission(submission.pk)
+            if code == copy:
+                copiers.append((user.pk, submission.pk))
+
+        groups = challenge_near_duplicates(challenge.pk)
+
+        self.assertEqual(groups, [{
+            'users': [user_id for user_id, _ in copiers],
+            'submissions': [submission_id for _, submission_id in copiers],
+            'similarity': 1.0
+        }])
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from progress.views import (
     UserProgressViewSet,
+    SubmissionViewSet,
     AchievementViewSet,
     LeaderboardViewSet
 )
@@ -10,6 +11,7 @@ from progress.views import (
 router = DefaultRouter()
 router.register(r'achievements', AchievementViewSet)
 router.register(r'user-progress', UserProgressViewSet, basename='userprogress')
+router.register(r'submissions', SubmissionViewSet, basename='submission')
 router.register(r'leaderboard', LeaderboardViewSet)
 
 urlpatterns = [
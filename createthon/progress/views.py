@@ -1,38 +1,56 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg, F, ExpressionWrapper, fields
+from django.conf import settings
+from django.db.models import Count, Sum, Avg, F, Q, ExpressionWrapper, fields
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from datetime import date, timedelta
 
 from progress.models import (
     UserProgress, 
     Achievement, 
     UserAchievement, 
-    Leaderboard
+    Leaderboard,
+    LeaderboardBucket,
+    ScoreHistogramBucket,
+    Submission,
+    DailyActivity,
+    UserStreak
 )
 from progress.serializers import (
     UserProgressSerializer,
+    SubmissionSerializer,
     AchievementSerializer,
     UserAchievementSerializer,
-    LeaderboardSerializer
+    LeaderboardSerializer,
+    LeaderboardBucketSerializer,
+    DailyActivitySerializer,
+    UserStreakSerializer
 )
-from challenges.models import Challenge
+from challenges.models import Counter
+from challenges.signals import PUBLISHED_CHALLENGES
 from django.contrib.auth import models
+from createthon.db_router import ReplicaReadMixin
+from progress.submissions import sweep_submissions
 from django.contrib.auth.models import User
 
-class UserProgressViewSet(viewsets.ModelViewSet):
+class UserProgressViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for handling User Progress"""
     serializer_class = UserProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         """Return progress only for the current user"""
-        return UserProgress.objects.filter(user=self.request.user)
+        return UserProgress.objects.filter(
+            user=self.request.user
+        ).select_related('challenge__category', 'latest_submission__blob')
 
     @action(detail=False, methods=['GET'])
     def user_challenge_summary(self, request):
         """Get summary of user's challenge progress"""
-        total_challenges = Challenge.objects.filter(status='published').count()
+        total_challenges = Counter.get_value(PUBLISHED_CHALLENGES)
         completed_challenges = UserProgress.objects.filter(
             user=request.user, 
             status='completed'
@@ -91,7 +109,84 @@ class UserProgressViewSet(viewsets.ModelViewSet):
             'category_completion': category_completion
         })
 
-class AchievementViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['GET'])
+    def activity(self, request):
+        """
+        Activity heatmap and streak for a profile (the current user, or ?user=<id>).
+        Covers the 365 days up to today, or a calendar year with ?year=YYYY;
+        only days with activity are listed.
+        """
+        user_id = request.query_params.get('user', request.user.pk)
+        if not str(user_id).isdigit():
+            raise ValidationError({'user': 'Must be a user id.'})
+
+        today = timezone.localdate()
+        year = request.query_params.get('year')
+        if year is None:
+            end = today
+            start = end - timedelta(days=364)
+        elif year.isdigit() and 1 <= int(year) <= 9999:
+            start = date(int(year), 1, 1)
+            end = date(int(year), 12, 31)
+        else:
+            raise ValidationError({'year': 'Must be a year such as 2025.'})
+
+        days = DailyActivity.objects.filter(user_id=user_id, day__range=(start, end))
+        streak = UserStreak.objects.filter(user_id=user_id).first() or UserStreak()
+        streak_data = UserStreakSerializer(streak).data
+        streak_data['current'] = streak.current_on(today)
+
+        return Response({
+            'user': int(user_id),
+            'start': start,
+            'end': end,
+            'active_days': len(days),
+            'streak': streak_data,
+            'days': DailyActivitySerializer(days, many=True).data
+        })
+
+
+class SubmissionViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the current user's submission history"""
+    serializer_class = SubmissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # Polling waits on the worker's write, which a lagging replica would hide
+    primary_read_actions = ('result',)
+
+    def get_queryset(self):
+        """Return submissions only for the current user, optionally for one challenge"""
+        queryset = Submission.objects.filter(user=self.request.user).select_related('blob')
+        challenge = self.request.query_params.get('challenge')
+        if challenge:
+            queryset = queryset.filter(challenge_id=challenge)
+        return queryset
+
+    @action(detail=True, methods=['GET'])
+    def result(self, request, pk=None):
+        """
+        Verdict and updated progress for a submission. Answers right away; while
+        the verdict is pending the response carries Retry-After for the next poll.
+        """
+        submission = self.get_object()
+        pending = submission.status in ('pending', 'processing')
+        if pending and getattr(settings, 'SUBMISSION_QUEUE', 'thread') == 'thread':
+            # Lets a waiting client recover a submission the pool dropped
+            sweep_submissions()
+
+        user_progress = UserProgress.objects.filter(
+            user=request.user,
+            challenge_id=submission.challenge_id
+        ).select_related('latest_submission__blob').first()
+
+        response = Response({
+            'submission': SubmissionSerializer(submission).data,
+            'user_progress': UserProgressSerializer(user_progress).data if user_progress else None
+        })
+        if pending:
+            response['Retry-After'] = getattr(settings, 'SUBMISSION_RESULT_RETRY_AFTER', 1)
+        return response
+
+class AchievementViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for handling Achievements"""
     queryset = Achievement.objects.all()
     serializer_class = AchievementSerializer
@@ -120,16 +215,54 @@ class AchievementViewSet(viewsets.ModelViewSet):
             
         return Response(data)
     
-class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+class LeaderboardViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for handling Leaderboard"""
     queryset = Leaderboard.objects.all().order_by('ranking')
     serializer_class = LeaderboardSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+    def _window(self):
+        """
+        The (period, bucket_start) asked for with ?window=day|week|month, or None
+        for the all-time board. ?start=YYYY-MM-DD selects an earlier window.
+        """
+        window = self.request.query_params.get('window', 'all')
+        if window == 'all':
+            return None
+        if window not in dict(LeaderboardBucket.PERIOD_CHOICES):
+            raise ValidationError({'window': 'Must be one of all, day, week, month'})
+        start = self.request.query_params.get('start')
+        if start is None:
+            return window, LeaderboardBucket.current_start(window)
+        day = parse_date(start)
+        if day is None:
+            raise ValidationError({'start': 'Must be a date (YYYY-MM-DD)'})
+        return window, LeaderboardBucket.start_of(window, day)
+
+    def _ranked_buckets(self, period, bucket_start, offset=0, limit=None):
+        """Bucket rows in rank order with their ranking filled in"""
+        buckets = LeaderboardBucket.objects.filter(
+            period=period,
+            bucket_start=bucket_start
+        ).select_related('user').order_by('-total_points', '-challenges_completed', 'user_id')
+        buckets = list(buckets[offset:offset + limit] if limit is not None else buckets[offset:])
+        for i, bucket in enumerate(buckets):
+            bucket.ranking = offset + i + 1
+        return buckets
+
+    def list(self, request, *args, **kwargs):
+        window = self._window()
+        if window is None:
+            return super().list(request, *args, **kwargs)
+        return Response(LeaderboardBucketSerializer(self._ranked_buckets(*window), many=True).data)
     
     @action(detail=False, methods=['GET'])
     def top_performers(self, request):
         """Get top performers on the leaderboard"""
         limit = int(request.query_params.get('limit', 10))
+        window = self._window()
+        if window is not None:
+            return Response(LeaderboardBucketSerializer(self._ranked_buckets(*window, limit=limit), many=True).data)
         top_performers = Leaderboard.objects.all().order_by('ranking')[:limit]
         serializer = LeaderboardSerializer(top_performers, many=True)
         return Response(serializer.data)
@@ -137,6 +270,9 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['GET'])
     def user_rank(self, request):
         """Get current user's rank on the leaderboard"""
+        window = self._window()
+        if window is not None:
+            return self._window_user_rank(request, *window)
         try:
             user_rank = Leaderboard.objects.get(user=request.user)
             serializer = LeaderboardSerializer(user_rank)
@@ -155,6 +291,72 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
             })
         except Leaderboard.DoesNotExist:
             return Response({'message': 'User not on leaderboard yet'}, status=404)
+
+    def _window_user_rank(self, request, period, bucket_start):
+        try:
+            bucket = LeaderboardBucket.objects.select_related('user').get(
+                period=period, bucket_start=bucket_start, user=request.user
+            )
+        except LeaderboardBucket.DoesNotExist:
+            return Response({'message': 'User not on this leaderboard yet'}, status=404)
+
+        # Rank is one more than the rows ordered ahead of the user's bucket
+        ahead = LeaderboardBucket.objects.filter(
+            period=period,
+            bucket_start=bucket_start
+        ).filter(
+            Q(total_points__gt=bucket.total_points) |
+            Q(total_points=bucket.total_points, challenges_completed__gt=bucket.challenges_completed) |
+            Q(total_points=bucket.total_points, challenges_completed=bucket.challenges_completed, user_id__lt=bucket.user_id)
+        ).count()
+        bucket.ranking = ahead + 1
+
+        nearby_users = [
+            nearby for nearby in self._ranked_buckets(period, bucket_start, offset=max(0, ahead - 2), limit=5)
+            if nearby.pk != bucket.pk
+        ]
+        return Response({
+            'user_rank': LeaderboardBucketSerializer(bucket).data,
+            'nearby_users': LeaderboardBucketSerializer(nearby_users, many=True).data
+        })
+    
+    @action(detail=False, methods=['GET'])
+    def distribution(self, request):
+        """Histogram of total points across the leaderboard"""
+        buckets = ScoreHistogramBucket.distribution()
+        return Response({
+            'bucket_width': ScoreHistogramBucket.width(),
+            'total_users': sum(count for _, _, count in buckets),
+            'buckets': [
+                {'min_points': lower, 'max_points': upper - 1, 'count': count}
+                for lower, upper, count in buckets
+            ]
+        })
+
+    @action(detail=False, methods=['GET'])
+    def percentile(self, request):
+        """
+        Share of users with fewer points than the current user. Interpolated
+        from the histogram, or counted exactly while the board is small.
+        """
+        try:
+            points = Leaderboard.objects.values_list('total_points', flat=True).get(user=request.user)
+        except Leaderboard.DoesNotExist:
+            return Response({'message': 'User not on leaderboard yet'}, status=404)
+
+        percentile, total_users = ScoreHistogramBucket.percentile(points)
+        exact = total_users <= getattr(settings, 'SCORE_HISTOGRAM_EXACT_MAX_USERS', 1000)
+        if exact:
+            total_users = Leaderboard.objects.count()
+            below = Leaderboard.objects.filter(total_points__lt=points).count()
+            percentile = below / total_users * 100
+
+        return Response({
+            'total_points': points,
+            'percentile': round(percentile, 1),
+            'total_users': total_users,
+            'exact': exact
+        })
     
     @action(detail=False, methods=['GET'])
     def category_leaders(self, request):
@@ -1,3 +1,5 @@
 from django.contrib import admin
+from users.models import StudyGroup,GroupMembership
 
-# Register your models here.
+admin.site.register(StudyGroup)
+admin.site.register(GroupMembership)
@@ -0,0 +1,137 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions derived from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class BlacklistIndex:
+    """
+    Per-process index of blacklisted refresh token jtis.
+
+    Lookups are answered from a Bloom filter backed by an exact jti map, so the
+    common "not blacklisted" case never touches the database. The index pulls
+    newly blacklisted rows by primary key at most every sync interval and is
+    rebuilt periodically to drop expired tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def capacity(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_INDEX_CAPACITY', 100000)
+
+    @property
+    def error_rate(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_INDEX_ERROR_RATE', 0.001)
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_INDEX_SYNC_INTERVAL', 1)
+
+    @property
+    def sync_overlap(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_INDEX_SYNC_OVERLAP', 200)
+
+    @property
+    def rebuild_interval(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_INDEX_REBUILD_INTERVAL', 3600)
+
+    def _rebuild(self):
+        """Reload every unexpired blacklisted jti from the database"""
+        rows = list(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=aware_utcnow()
+            ).values_list('id', 'token__jti', 'token__expires_at')
+        )
+        self._bloom_capacity = max(self.capacity, len(rows) * 2)
+        self._bloom = BloomFilter(self._bloom_capacity, self.error_rate)
+        self._expires = {}
+        self._last_id = 0
+        for row_id, jti, expires_at in rows:
+            self._insert(jti, expires_at)
+            self._last_id = max(self._last_id, row_id)
+        now = time.monotonic()
+        self._last_sync = now
+        self._last_rebuild = now
+        self._loaded = True
+
+    def _sync(self):
+        """Pull rows blacklisted since the last sync"""
+        # Re-read a window of recent ids so rows committed out of id order are not missed
+        rows = BlacklistedToken.objects.filter(
+            id__gt=self._last_id - self.sync_overlap
+        ).values_list('id', 'token__jti', 'token__expires_at')
+        for row_id, jti, expires_at in rows:
+            self._insert(jti, expires_at)
+            self._last_id = max(self._last_id, row_id)
+        self._last_sync = time.monotonic()
+
+    def _insert(self, jti, expires_at):
+        self._bloom.add(jti)
+        self._expires[jti] = expires_at
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (
+            not self._loaded
+            or now - self._last_rebuild >= self.rebuild_interval
+            or len(self._expires) > self._bloom_capacity
+        ):
+            self._rebuild()
+        elif now - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def contains(self, jti):
+        """Return True if the given jti has been blacklisted"""
+        with self._lock:
+            self._refresh()
+            if jti not in self._bloom:
+                return False
+            return jti in self._expires
+
+    def add(self, jti, expires_at):
+        """Record a token blacklisted by this process"""
+        with self._lock:
+            if self._loaded:
+                self._insert(jti, expires_at)
+
+    def clear(self):
+        """Drop the index so it is rebuilt on the next lookup"""
+        with self._lock:
+            self._loaded = False
+
+
+blacklist_index = BlacklistIndex()
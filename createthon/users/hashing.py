@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+from createthon.executors import BoundedExecutor, Saturated
+
+hashing_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 4),
+    max_pending=getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 16),
+    thread_name_prefix='password-hashing'
+)
+
+
+def run_hasher(fn, *args):
+    """Run a password hashing call on the bounded pool, or fail fast with a 429"""
+    try:
+        future = hashing_executor.submit(fn, *args)
+    except Saturated:
+        raise Throttled(
+            wait=getattr(settings, 'PASSWORD_HASHING_RETRY_AFTER', 1),
+            detail="Too many sign-in requests are being processed, try again shortly."
+        )
+    return future.result()
+
+
+def hash_password(raw_password):
+    """Hash a new password on the hashing pool"""
+    return run_hasher(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """Check a user's password on the hashing pool, upgrading the stored hash if needed"""
+    needs_upgrade = []
+    is_correct = run_hasher(
+        check_password, raw_password, user.password, lambda _: needs_upgrade.append(True)
+    )
+    if is_correct and needs_upgrade:
+        # Rehash with the preferred hasher, saving from the request thread
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
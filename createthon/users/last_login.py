@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from createthon.buffering import BufferedWriter
+
+
+class LastLoginBuffer(BufferedWriter):
+    """Batches `last_login` updates for token-only logins"""
+
+    def combine(self, current, value):
+        return max(current, value)
+
+    def write(self, pending):
+        User.objects.bulk_update(
+            [User(pk=user_id, last_login=logged_in_at) for user_id, logged_in_at in pending.items()],
+            ['last_login'],
+            batch_size=500
+        )
+
+
+last_login_buffer = LastLoginBuffer(getattr(settings, 'LAST_LOGIN_FLUSH_INTERVAL', 10))
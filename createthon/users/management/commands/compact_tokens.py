@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired blacklisted and outstanding tokens in batches. "
+        "Meant to be scheduled (e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows deleted per statement")
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        batch_size = options['batch_size']
+        pause = options['pause']
+
+        # Blacklist rows go first so the outstanding deletes have nothing to cascade into
+        blacklisted = self._delete_in_batches(
+            BlacklistedToken.objects.filter(token__expires_at__lte=now), batch_size, pause
+        )
+        outstanding = self._delete_in_batches(
+            OutstandingToken.objects.filter(expires_at__lte=now), batch_size, pause
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {blacklisted} blacklisted and {outstanding} outstanding tokens"
+        ))
+
+    def _delete_in_batches(self, queryset, batch_size, pause):
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            queryset.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import ProvisioningJob
+from users.provisioning import create_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the users of cohort provisioning jobs queued (already hashed) by "
+        "the staff API; runs as a long-lived worker unless --once is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=5,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--stale-after', type=int, default=3600,
+                            help="Seconds after which a running job is assumed lost and claimed again, "
+                                 "or a job still hashing is failed")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the current queue and exit")
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job = self._claim(options['stale_after'])
+            if job is not None:
+                self._run(job)
+                processed += 1
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {processed} provisioning jobs"))
+
+    def _claim(self, stale_after):
+        """Oldest pending job (or one whose worker died), skipping jobs another worker has locked"""
+        stale = timezone.now() - timedelta(seconds=stale_after)
+        # The web process that was hashing these went away; nothing was stored to resume from
+        ProvisioningJob.objects.filter(status='hashing', created_at__lt=stale).update(
+            status='failed',
+            result={'error': 'Upload was interrupted before its passwords were hashed; upload it again'},
+            finished_at=timezone.now()
+        )
+        with transaction.atomic():
+            job = ProvisioningJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending') | Q(status='running', started_at__lt=stale)
+            ).order_by('created_at').first()
+            if job is not None:
+                job.status = 'running'
+                job.started_at = timezone.now()
+                job.save(update_fields=['status', 'started_at'])
+        return job
+
+    def _run(self, job):
+        # Rows are hashed users plus the errors of rows that failed validation
+        errors = [row for row in job.rows if 'errors' in row]
+        hashed = [row for row in job.rows if 'errors' not in row]
+        try:
+            result = create_users(hashed, errors, create_leaderboard=job.create_leaderboard)
+        except Exception as e:
+            job.status, job.result = 'failed', {'error': str(e)}
+            self.stderr.write(f"Job {job.pk} failed: {e}")
+        else:
+            job.status, job.result = 'done', result
+            self.stdout.write(f"Job {job.pk}: created {result['created']}, {result['failed']} rows failed")
+        job.rows = []
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'result', 'rows', 'finished_at'])
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import provision_users, read_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates users from a CSV file with username, email and password columns "
+        "(first_name and last_name optional), hashing passwords in parallel"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Path to the cohort CSV file")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Hashing processes (defaults to the CPU count)")
+        parser.add_argument('--with-leaderboard', action='store_true',
+                            help="Also create an empty leaderboard entry for every new user")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows per INSERT statement")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                rows = read_csv(csv_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        result = provision_users(
+            rows,
+            workers=options['workers'],
+            create_leaderboard=options['with_leaderboard'],
+            batch_size=options['batch_size']
+        )
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']} ({error['username'] or '-'}): {' '.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} users, {result['failed']} rows failed"
+        ))
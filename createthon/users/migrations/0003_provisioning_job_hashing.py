@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 07:19
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def drop_plain_rows(apps, schema_editor):
+    # Jobs queued before uploads were hashed hold plain passwords; they have to be uploaded again
+    ProvisioningJob = apps.get_model('users', 'ProvisioningJob')
+    ProvisioningJob.objects.filter(status__in=['pending', 'running']).update(
+        status='failed',
+        rows=[],
+        result={'error': 'Queued before uploads were hashed; upload it again'},
+        finished_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_provisioning_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='provisioningjob',
+            name='status',
+            field=models.CharField(choices=[('hashing', 'Hashing'), ('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.RunPython(drop_plain_rows, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,81 @@
 from django.db import models
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 
-# Create your models here.
+
+class StudyGroup(models.Model):
+    """A class cohort (managed by staff) or a student's group of friends"""
+    KIND_CHOICES = [
+        ('cohort', 'Cohort'),
+        ('friends', 'Friends')
+    ]
+
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='friends')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_groups')
+    members = models.ManyToManyField(User, through='GroupMembership', related_name='study_groups')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.kind})"
+
+    @staticmethod
+    def members_cache_key(group_id):
+        return f'study-group-members:{group_id}'
+
+    def member_ids(self):
+        """Ids of every member, cached until the membership changes or the timeout passes"""
+        ids = cache.get(self.members_cache_key(self.pk))
+        if ids is None:
+            ids = list(GroupMembership.objects.filter(group=self).values_list('user_id', flat=True))
+            cache.set(self.members_cache_key(self.pk), ids, getattr(settings, 'STUDY_GROUP_MEMBERS_CACHE_TIMEOUT', 300))
+        return ids
+
+    def invalidate_members(self):
+        cache.delete(self.members_cache_key(self.pk))
+
+
+class GroupMembership(models.Model):
+    group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('group', 'user')
+
+    def __str__(self):
+        return f"{self.user.username} in {self.group.name}"
+
+
+class ProvisioningJob(models.Model):
+    """
+    A cohort CSV uploaded through the staff API. The web process hashes the
+    passwords first ('hashing'), so rows only ever hold password hashes and
+    the errors of invalid rows; the process_provisioning_jobs worker then
+    creates the users and clears the rows.
+    """
+    STATUS_CHOICES = [
+        ('hashing', 'Hashing'),
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows = models.JSONField(default=list, blank=True)
+    create_leaderboard = models.BooleanField(default=False)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'])
+        ]
+
+    def __str__(self):
+        return f"Provisioning job {self.pk} ({self.status})"
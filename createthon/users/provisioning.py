@@ -0,0 +1,228 @@
+import csv
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from createthon.executors import BoundedExecutor
+from progress.models import Leaderboard, ScoreHistogramBucket
+from progress.ranking import invalidate_global_ranking
+from users.models import ProvisioningJob
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('username', 'email', 'password')
+
+# Hashes uploaded cohorts in the web process, so plain passwords never reach the database
+upload_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'USER_PROVISIONING_UPLOAD_WORKERS', 1),
+    max_pending=getattr(settings, 'USER_PROVISIONING_UPLOAD_MAX_PENDING', 4),
+    thread_name_prefix='provisioning-upload'
+)
+
+
+def read_csv(csv_file):
+    """Parse an uploaded or opened CSV file into a list of row dicts"""
+    content = csv_file.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    return list(reader)
+
+
+def _validate_rows(rows):
+    """Split rows into valid users and per-row errors (row numbers match the CSV lines)"""
+    valid, errors, seen = [], [], set()
+
+    for line, row in enumerate(rows, start=2):
+        username = (row.get('username') or '').strip()
+        email = (row.get('email') or '').strip()
+        password = row.get('password') or ''
+        row_errors = []
+
+        if not username:
+            row_errors.append("Username is required.")
+        elif username in seen:
+            row_errors.append("Duplicate username in file.")
+        try:
+            validate_email(email)
+        except ValidationError:
+            row_errors.append("Enter a valid email address.")
+
+        user = User(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
+            first_name=(row.get('first_name') or '').strip(),
+            last_name=(row.get('last_name') or '').strip()
+        )
+        try:
+            validate_password(password, user)
+        except ValidationError as e:
+            row_errors.extend(e.messages)
+
+        seen.add(username)
+        if row_errors:
+            errors.append({'row': line, 'username': username, 'errors': row_errors})
+        else:
+            valid.append((line, user, password))
+
+    valid = _drop_taken(valid, errors)
+    errors.sort(key=lambda error: error['row'])
+    return valid, errors
+
+
+def _drop_taken(valid, errors):
+    """Remove rows whose username already exists, reporting them, with one query"""
+    taken = set(User.objects.filter(
+        username__in=[user.username for _, user, _ in valid]
+    ).values_list('username', flat=True))
+    if taken:
+        errors.extend(
+            {'row': line, 'username': user.username, 'errors': ["A user with that username already exists."]}
+            for line, user, _ in valid if user.username in taken
+        )
+        valid = [entry for entry in valid if entry[1].username not in taken]
+    return valid
+
+
+def _hash_passwords(passwords, workers):
+    """Hash passwords across a process pool, one chunk per worker at a time"""
+    if workers <= 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _create_individually(valid, errors):
+    """Insert users one at a time, reporting rows that hit a uniqueness conflict"""
+    created = []
+    for line, user, _ in valid:
+        user.pk = None
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError:
+            errors.append({
+                'row': line,
+                'username': user.username,
+                'errors': ["A user with that username already exists."]
+            })
+        else:
+            created.append(user)
+    errors.sort(key=lambda error: error['row'])
+    return created
+
+
+def hash_rows(rows, workers=None):
+    """
+    Validate CSV rows and hash the passwords of the valid ones. Returns the
+    valid rows as dicts holding the hash instead of the password, each with
+    its CSV line under 'row', and the per-row errors.
+    """
+    workers = workers or os.cpu_count() or 1
+    valid, errors = _validate_rows(rows)
+    hashes = _hash_passwords([password for _, _, password in valid], workers)
+    hashed = [
+        {
+            'row': line,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'password': encoded
+        }
+        for (line, user, _), encoded in zip(valid, hashes)
+    ]
+    return hashed, errors
+
+
+def create_users(hashed_rows, errors=(), create_leaderboard=False, batch_size=1000):
+    """
+    Insert rows prepared by hash_rows, skipping usernames taken since they
+    were validated. Invalid rows are reported along with the given errors.
+    """
+    errors = list(errors)
+    valid = [
+        (row['row'], User(
+            username=row['username'],
+            email=row['email'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            password=row['password']
+        ), None)
+        for row in hashed_rows
+    ]
+    valid = _drop_taken(valid, errors)
+    users = [user for _, user, _ in valid]
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                created = User.objects.bulk_create(users, batch_size=batch_size)
+        except IntegrityError:
+            # A username was taken after validation; insert one by one so only those rows fail
+            created = _create_individually(valid, errors)
+        if create_leaderboard and created:
+            # bulk_create sends no post_save, so count the new entries and refresh rankings here.
+            # New accounts have no points and the highest ids, so they rank last in creation order
+            ranked = Leaderboard.objects.count()
+            Leaderboard.objects.bulk_create(
+                [Leaderboard(user=user, ranking=ranked + i) for i, user in enumerate(created, start=1)],
+                batch_size=batch_size
+            )
+            ScoreHistogramBucket.add(0, len(created))
+            invalidate_global_ranking()
+
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'created': len(created),
+        'failed': len(errors),
+        'errors': errors
+    }
+
+
+def provision_users(rows, workers=None, create_leaderboard=False, batch_size=1000):
+    """
+    Create users in bulk from CSV rows with username, email and password
+    (first_name and last_name optional). Invalid rows are skipped and reported.
+    """
+    hashed, errors = hash_rows(rows, workers)
+    return create_users(hashed, errors, create_leaderboard=create_leaderboard, batch_size=batch_size)
+
+
+def queue_job(job, rows):
+    """
+    Hash an uploaded job's rows on the upload pool and hand the job to the
+    process_provisioning_jobs worker. The job only ever stores hashes and the
+    errors of invalid rows. Raises Saturated when the pool is full.
+    """
+    upload_executor.submit(_hash_job, job.pk, rows)
+
+
+def _hash_job(job_id, rows):
+    close_old_connections()
+    try:
+        hashed, errors = hash_rows(rows, workers=1)
+        # Invalid rows are kept as their errors, without the password
+        ProvisioningJob.objects.filter(pk=job_id, status='hashing').update(status='pending', rows=hashed + errors)
+    except Exception as e:
+        logger.exception("Hashing provisioning job %s failed", job_id)
+        ProvisioningJob.objects.filter(pk=job_id).update(
+            status='failed', result={'error': str(e)}, finished_at=timezone.now()
+        )
+    finally:
+        close_old_connections()
@@ -2,9 +2,11 @@ from rest_framework import serializers
 from rest_framework_simplejwt.views import (
     TokenObtainPairView
 )
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth.models import User
-from django.contrib.auth  import authenticate
+from users.models import StudyGroup
+from users.tokens import IndexedRefreshToken
+from users.hashing import hash_password, verify_password
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -26,6 +28,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         return token
 
+class IndexedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that checks the blacklist through the in-process index
+    """
+    token_class = IndexedRefreshToken
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration
@@ -47,7 +55,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email'])
+        )
+        # Hash on the bounded hashing pool rather than inline in create_user()
+        user.password = hash_password(password)
+        user.save()
         return user
 
 class LoginSerializer(serializers.Serializer):
@@ -64,14 +79,30 @@ class LoginSerializer(serializers.Serializer):
             except User.DoesNotExist:
                 raise serializers.ValidationError("User with this username does not exist.")
             
-            user = authenticate(username=username, password=password)
-            if user:
-                if not user.is_active:
-                    raise serializers.ValidationError("User account is disabled.")
-            else:
+            # Check the password on the row we already have instead of a second lookup via authenticate()
+            if not verify_password(user, password):
                 raise serializers.ValidationError("Invalid password.")
+            if not user.is_active:
+                raise serializers.ValidationError("User account is disabled.")
             
             data['user'] = user
             return data
         else:
-            raise serializers.ValidationError("Must provide username and password.")
\ No newline at end of file
+            raise serializers.ValidationError("Must provide username and password.")
+
+class StudyGroupSerializer(serializers.ModelSerializer):
+    owner = serializers.ReadOnlyField(source='owner.username')
+    member_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StudyGroup
+        fields = ['id', 'name', 'kind', 'owner', 'member_count', 'created_at']
+
+    def get_member_count(self, obj):
+        return len(obj.member_ids())
+
+    def validate_kind(self, value):
+        request = self.context.get('request')
+        if value == 'cohort' and not (request and request.user.is_staff):
+            raise serializers.ValidationError("Only staff can create cohorts.")
+        return value
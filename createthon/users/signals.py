@@ -0,0 +1,14 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import GroupMembership, StudyGroup
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def refresh_members_on_change(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        key = StudyGroup.members_cache_key(instance.group_id)
+        transaction.on_commit(lambda: cache.delete(key))
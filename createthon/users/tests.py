@@ -1,3 +1,82 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.blacklist import blacklist_index
+from users.models import ProvisioningJob
+from users.provisioning import upload_executor
+from users.tokens import IndexedRefreshToken
+
+
+@override_settings(TOKEN_BLACKLIST_INDEX_SYNC_INTERVAL=0)
+class RefreshBlacklistTests(TestCase):
+    """Revoked refresh tokens are rejected even though lookups skip the blacklist tables"""
+
+    def setUp(self):
+        cache.clear()
+        blacklist_index.clear()
+        self.user = User.objects.create_user('holder', 'holder@example.com', 'x')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/refresh/', {'refresh': str(token)}, format='json')
+
+    def test_token_revoked_by_logout_is_rejected(self):
+        token = IndexedRefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/auth/logout/', {'refresh': str(token)}, format='json')
+        self.assertEqual(response.status_code, 205)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = IndexedRefreshToken.for_user(self.user)
+
+        self.assertEqual(self.refresh(token).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_token_revoked_by_another_process_is_picked_up_on_sync(self):
+        token = IndexedRefreshToken.for_user(self.user)
+        other = IndexedRefreshToken.for_user(self.user)
+        # Load the index first, then blacklist behind its back as another worker would
+        self.assertEqual(self.refresh(other).status_code, 200)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+class ProvisioningUploadTests(TransactionTestCase):
+    """Uploaded cohorts are stored with hashed passwords only"""
+    PASSWORD = 'A-long-passphrase-42'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('staff', 'staff@example.com', 'x'))
+
+    def test_job_rows_never_hold_plain_passwords(self):
+        content = 'username,email,password\n' + ''.join(
+            f'cohort{i},cohort{i}@example.com,{self.PASSWORD}\n' for i in range(3)
+        ) + 'cohort0,bad-email,Qz7x\n'
+        response = self.client.post('/api/users/provision/', {
+            'file': SimpleUploadedFile('cohort.csv', content.encode(), content_type='text/csv')
+        })
+        self.assertEqual(response.status_code, 202)
+        while upload_executor.backlog:
+            time.sleep(0.01)
+
+        job = ProvisioningJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, 'pending')
+        self.assertNotIn(self.PASSWORD, str(job.rows))
+        self.assertNotIn('Qz7x', str(job.rows))
+
+        call_command('process_provisioning_jobs', '--once', stdout=open('/dev/null', 'w'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows), ('done', []))
+        self.assertEqual((job.result['created'], job.result['failed']), (3, 1))
+        self.assertTrue(User.objects.get(username='cohort1').check_password(self.PASSWORD))
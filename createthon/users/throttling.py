@@ -0,0 +1,31 @@
+from createthon.throttling import SlidingWindowThrottle
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """Limits login attempts per client IP"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class LoginUsernameThrottle(SlidingWindowThrottle):
+    """Limits login attempts per target username, whatever IP they come from"""
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not username or not isinstance(username, str):
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': username.lower()
+        }
+
+
+class RegistrationIPThrottle(LoginIPThrottle):
+    """Limits account registrations per client IP"""
+    scope = 'register_ip'
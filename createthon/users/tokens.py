@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from users.blacklist import blacklist_index
+
+
+class IndexedRefreshToken(RefreshToken):
+    """
+    Refresh token that checks the blacklist through the in-process index
+    instead of querying the blacklist tables on every refresh
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        if blacklist_index.contains(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_index.add(
+            self.payload[api_settings.JTI_CLAIM],
+            datetime_from_epoch(self.payload['exp'])
+        )
+        return result
@@ -4,15 +4,21 @@ from rest_framework_simplejwt.views import (
 )
 from users.views import (
     UserRegistrationView,
-    AuthViewSet
+    UserProvisioningView,
+    UserProvisioningJobView,
+    AuthViewSet,
+    StudyGroupViewSet
 )
 from rest_framework.routers import DefaultRouter
 
 router=DefaultRouter()
 router.register(r'auth',AuthViewSet,basename='auth')
+router.register(r'groups',StudyGroupViewSet,basename='studygroup')
 
 urlpatterns = [
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/register/', UserRegistrationView.as_view(), name='user_register'),
+    path('api/users/provision/', UserProvisioningView.as_view(), name='user_provision'),
+    path('api/users/provision/<int:pk>/', UserProvisioningJobView.as_view(), name='user_provision_job'),
     path('api/',include(router.urls))
 ]
\ No newline at end of file
@@ -4,13 +4,32 @@ from users.serializers import (
     UserRegistrationSerializer,
     CustomTokenObtainPairSerializer,
     LoginSerializer,
-    UserSerializer
+    UserSerializer,
+    StudyGroupSerializer
 )
 from rest_framework.generics import CreateAPIView
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
 from django.contrib.auth import login
+from django.utils import timezone
 from rest_framework.permissions import AllowAny,IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.reverse import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import IndexedRefreshToken
+from users.last_login import last_login_buffer
+from users.provisioning import queue_job, read_csv
+from users.throttling import LoginIPThrottle, LoginUsernameThrottle, RegistrationIPThrottle
+from users.models import StudyGroup, GroupMembership, ProvisioningJob
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied
+from bisect import bisect_left
+from createthon.db_router import ReplicaReadMixin
+from createthon.executors import Saturated
+from progress.ranking import global_ranking
 
 
 class UserRegistrationView(CreateAPIView):
@@ -19,6 +38,7 @@ class UserRegistrationView(CreateAPIView):
     """
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegistrationIPThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -38,15 +58,85 @@ class UserRegistrationView(CreateAPIView):
             'access': str(refresh.access_token)
         }, status=status.HTTP_201_CREATED)
 
+class UserProvisioningView(APIView):
+    """
+    Staff-only bulk creation of a cohort of users from an uploaded CSV file,
+    queued as a job and answered with its status URL
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        csv_file = request.FILES.get('file')
+        if not csv_file:
+            return Response({'error': 'CSV file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows = read_csv(csv_file)
+        except (UnicodeDecodeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not rows:
+            return Response({'error': 'CSV has no rows'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Hashing a cohort takes minutes, so it runs off the request and only the
+        # hashes are stored for the process_provisioning_jobs worker
+        job = ProvisioningJob.objects.create(
+            created_by=request.user,
+            status='hashing',
+            create_leaderboard=str(request.data.get('create_leaderboard', '')).lower() in ('1', 'true', 'yes')
+        )
+        try:
+            queue_job(job, rows)
+        except Saturated:
+            job.delete()
+            return Response(
+                {'error': 'Too many uploads are being processed, try again shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(getattr(settings, 'USER_PROVISIONING_UPLOAD_RETRY_AFTER', 30))}
+            )
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'rows': len(rows),
+            'status_url': reverse('user_provision_job', args=[job.id], request=request)
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class UserProvisioningJobView(APIView):
+    """
+    Staff-only status of a provisioning job, with the created count and
+    per-row errors once it has run
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk, *args, **kwargs):
+        job = ProvisioningJob.objects.filter(pk=pk).first()
+        if job is None:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'result': job.result
+        })
+
 class AuthViewSet(viewsets.ViewSet):
 
-    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny],
+            throttle_classes=[LoginIPThrottle, LoginUsernameThrottle])
     def login(self, request):
         serializer = LoginSerializer(data=request.data)
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            login(request, user)
+            if getattr(settings, 'AUTH_SESSION_LOGIN', False):
+                login(request, user)
+            else:
+                # Token-only login: no session row or CSRF rotation, last_login is flushed in batches
+                last_login_buffer.add(user.pk, timezone.now())
             
             # Generate tokens
             refresh = RefreshToken.for_user(user)
@@ -72,7 +162,7 @@ class AuthViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            token = RefreshToken(refresh_token)
+            token = IndexedRefreshToken(refresh_token)
             token.blacklist()
             
             return Response(
@@ -83,4 +173,121 @@ class AuthViewSet(viewsets.ViewSet):
             return Response(
                 {"error": str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+class StudyGroupViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    """
+    Cohorts (created by staff) and groups of friends, with a leaderboard of
+    their members. Owners and staff manage a group; members can view it.
+    """
+    serializer_class = StudyGroupSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = StudyGroup.objects.select_related('owner')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(
+            Q(owner=self.request.user) | Q(members=self.request.user)
+        ).distinct()
+
+    def _check_manager(self, group):
+        if not (self.request.user.is_staff or group.owner_id == self.request.user.id):
+            raise PermissionDenied("Only the group owner can manage this group.")
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            group = serializer.save(owner=self.request.user)
+            GroupMembership.objects.create(group=group, user=self.request.user)
+
+    def perform_update(self, serializer):
+        self._check_manager(serializer.instance)
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        self._check_manager(instance)
+        instance.delete()
+
+    @action(detail=True, methods=['POST'])
+    def add_members(self, request, pk=None):
+        """Add users to the group by id or username"""
+        group = self.get_object()
+        self._check_manager(group)
+        users = User.objects.filter(
+            Q(id__in=[i for i in request.data.get('user_ids', []) if str(i).isdigit()]) |
+            Q(username__in=request.data.get('usernames', []))
+        ).values_list('id', flat=True)
+
+        before = len(group.member_ids())
+        with transaction.atomic():
+            # bulk_create sends no signals, so drop the cached member list ourselves
+            GroupMembership.objects.bulk_create(
+                [GroupMembership(group=group, user_id=user_id) for user_id in users],
+                ignore_conflicts=True
+            )
+            transaction.on_commit(group.invalidate_members)
+        member_count = len(group.member_ids())
+        return Response({'added': member_count - before, 'member_count': member_count})
+
+    @action(detail=True, methods=['POST'])
+    def remove_members(self, request, pk=None):
+        """Remove users from the group; members may remove themselves"""
+        group = self.get_object()
+        user_ids = [int(i) for i in request.data.get('user_ids', []) if str(i).isdigit()]
+        if user_ids != [request.user.id]:
+            self._check_manager(group)
+        removed, _ = GroupMembership.objects.filter(group=group, user_id__in=user_ids).delete()
+        return Response({'removed': removed})
+
+    @action(detail=True, methods=['GET'])
+    def leaderboard(self, request, pk=None):
+        """
+        Members ranked by their global leaderboard position. The group's member
+        set is intersected with the in-process, score-sorted global ranking, so
+        no per-request SQL ranking is needed even for very large groups.
+        """
+        group = self.get_object()
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+
+        # One snapshot for the whole request, so positions and ids always agree
+        ranking = global_ranking.refresh()
+        member_ids = group.member_ids()
+        positions = ranking.rank(member_ids)
+        page = positions[offset:offset + limit]
+
+        users = User.objects.only('id', 'username', 'first_name', 'last_name').in_bulk(
+            [ranking.user_ids[position] for position in page]
+        )
+        results = []
+        for i, position in enumerate(page):
+            user = users.get(ranking.user_ids[position])
+            if user is None:
+                continue
+            results.append({
+                'rank': offset + i + 1,
+                'global_rank': position + 1,
+                'user': {
+                    'id': user.id,
+                    'username': user.username,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name
+                },
+                'total_points': ranking.points[position],
+                'challenges_completed': ranking.completed[position]
+            })
+
+        my_rank = None
+        my_position = ranking.position.get(request.user.id)
+        if my_position is not None:
+            index = bisect_left(positions, my_position)
+            if index < len(positions) and positions[index] == my_position:
+                my_rank = index + 1
+
+        return Response({
+            'group': StudyGroupSerializer(group, context={'request': request}).data,
+            'ranked_members': len(positions),
+            'unranked_members': len(member_ids) - len(positions),
+            'my_rank': my_rank,
+            'results': results
+        })